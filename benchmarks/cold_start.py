@@ -0,0 +1,70 @@
+"""
+Cold start cost for each ENABLE_ADMIN mode: time to import src/app.py (cumulative figure from `python -X importtime`),
+then the first GET /people and the first GET /admin/ in the fresh process. Median of several fresh interpreters.
+ENABLE_ADMIN=true is how the app booted before the admin was loaded lazily.
+
+    $ pipenv run python benchmarks/cold_start.py
+    $ pipenv run python benchmarks/cold_start.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loadgen import ROOT  # noqa: E402
+from seed import seed_database  # noqa: E402
+
+SRC = os.path.join(ROOT, 'src')
+MODES = ['true', 'lazy', 'false']
+
+PROBE = """
+import json, time
+import app
+client = app.app.test_client()
+timings = {}
+for path in ('/people', '/admin/'):
+    start = time.perf_counter()
+    client.get(path)
+    timings[path] = (time.perf_counter() - start) * 1000
+print(json.dumps(timings))
+"""
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0], formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    return parser.parse_args()
+
+def import_time_ms(stderr):
+    """Cumulative import time of the app module, the last line of the -X importtime report"""
+    for line in reversed(stderr.splitlines()):
+        if line.startswith('import time:') and line.rsplit('|', 1)[1].strip() == 'app':
+            return int(line.split('|')[1]) / 1000.0
+    raise RuntimeError("app not found in the importtime report")
+
+def run(mode, database_url):
+    env = dict(os.environ, ENABLE_ADMIN=mode, DATABASE_URL=database_url)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=SRC, env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return import_time_ms(result.stderr), timings['/people'], timings['/admin/']
+
+def main():
+    args = parse_args()
+    database_url = os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'cold_start.db')
+    seed_database(100)
+    results = {}
+    for mode in MODES:
+        runs = [run(mode, database_url) for _ in range(args.runs)]
+        results[mode] = {
+            "import_ms": round(statistics.median(r[0] for r in runs), 1),
+            "first_people_ms": round(statistics.median(r[1] for r in runs), 1),
+            "first_admin_ms": round(statistics.median(r[2] for r in runs), 1),
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Small asyncio HTTP/1.1 load generator shared by the benchmarks, it only needs the standard library.
+Connections are kept alive between requests unless the server closes them (gunicorn sync workers always do).
+"""
+import asyncio
+import gzip
+import os
+import socket
+import subprocess
+import time
+from contextlib import contextmanager
+from collections import namedtuple
+
+Sample = namedtuple('Sample', ['name', 'status', 'latency', 'size'])
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+class StaleConnection(Exception):
+    pass
+
+class Client:
+    def __init__(self, host, port, timeout=30, headers=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        # sent with every request, like an Accept-Encoding
+        self.headers = headers or {}
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, target, body=None, headers=None):
+        """Send one request and return (status, headers, body), status 0 when the connection failed"""
+        # like any HTTP client, retry once when a kept alive connection turns out to be closed by the server
+        # before it answered (idle timeout, gunicorn recycling a worker after max_requests)
+        retry = self.writer is not None
+        while True:
+            try:
+                return await asyncio.wait_for(self._request(method, target, body, dict(self.headers, **(headers or {}))), self.timeout)
+            except StaleConnection:
+                await self.close()
+                if not retry:
+                    return 0, {}, b''
+                retry = False
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                await self.close()
+                return 0, {}, b''
+
+    async def _request(self, method, target, body, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = body or b''
+        lines = ["%s %s HTTP/1.1" % (method, target), "Host: %s:%d" % (self.host, self.port), "Content-Length: %d" % len(body)]
+        lines += ["%s: %s" % item for item in headers.items()]
+        try:
+            self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+            await self.writer.drain()
+            status_line = await self.reader.readuntil(b"\r\n")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise StaleConnection()
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding') == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b';')[0], 16)
+                chunks.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            data = b''.join(chunk[:-2] for chunk in chunks)
+        elif 'content-length' in response_headers:
+            data = await self.reader.readexactly(int(response_headers['content-length']))
+        elif status in (204, 304) or method == 'HEAD':
+            data = b''
+        else:
+            data = await self.reader.read()
+            response_headers['connection'] = 'close'
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, response_headers, data
+
+def decode_body(headers, data):
+    """Response body without its Content-Encoding, the size samples keep the bytes that went over the wire"""
+    encoding = headers.get('content-encoding')
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        import brotli
+        return brotli.decompress(data)
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+async def timed_request(client, name, method, target, body=None, headers=None):
+    start = time.perf_counter()
+    status, _, data = await client.request(method, target, body, headers)
+    return Sample(name, status, time.perf_counter() - start, len(data))
+
+async def closed_loop(host, port, next_request, concurrency, duration, headers=None):
+    """
+    concurrency clients each send a request as soon as their previous one is answered, for duration seconds.
+    next_request() returns (name, method, target, body) and is called for every request, headers go with all of them.
+    Returns the samples and the elapsed time.
+    """
+    samples = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        client = Client(host, port, headers=headers)
+        while time.perf_counter() < deadline:
+            name, method, target, body = next_request()
+            samples.append(await timed_request(client, name, method, target, body))
+        await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server on port %d did not start" % port)
+
+@contextmanager
+def serve(command, port, env=None):
+    """Run a server command from the repository root until the block exits"""
+    server = subprocess.Popen(command, cwd=ROOT, env=env or os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        yield server
+    finally:
+        server.terminate()
+        server.wait()
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+def summarize(samples, elapsed):
+    """Per request name and overall: count, errors (status 0 or >= 500), throughput, latency percentiles in ms, bytes"""
+    groups = {}
+    for sample in samples:
+        groups.setdefault(sample.name, []).append(sample)
+    groups['all'] = samples
+
+    summary = {}
+    for name, group in groups.items():
+        latencies = [sample.latency * 1000 for sample in group]
+        summary[name] = {
+            "requests": len(group),
+            "errors": sum(1 for sample in group if sample.status == 0 or sample.status >= 500),
+            "rps": round(len(group) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "bytes": sum(sample.size for sample in group)
+        }
+    return summary
@@ -0,0 +1,80 @@
+"""
+Serialization share of the latency of GET /people and GET /planets.
+
+For every table size it times the old path (ORM objects + serialize() + stdlib json) against the
+new one (with_entities rows + orjson), split in query / dict building / encoding, then the full
+?limit=all request through the Flask test client with each JSON provider.
+
+    $ pipenv run python benchmarks/serialization.py            # 1k, 10k and 100k rows
+    $ pipenv run python benchmarks/serialization.py 5000 50000
+"""
+import os
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'serialization_benchmark.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DB_PATH
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from app import app  # noqa: E402
+from json_provider import OrJSONProvider, orjson  # noqa: E402
+from models import db, serialize_columns, Character, Planet  # noqa: E402
+
+ROUTES = [('/people', Character), ('/planets', Planet)]
+
+def seed(rows):
+    db.drop_all()
+    db.create_all()
+    db.session.bulk_insert_mappings(Character, [
+        {"name": "Character %d" % i, "description": "x" * 500, "species": "Human", "homeworld": "Tatooine",
+         "affiliation": "Rebel Alliance", "gender": "female"} for i in range(rows)])
+    db.session.bulk_insert_mappings(Planet, [
+        {"name": "Planet %d" % i, "description": "x" * 500, "diameter": 10465.0, "orbital_period": 304,
+         "terrain_type": "desert", "atmosphere": "breathable", "population": 200000, "climate": "arid"} for i in range(rows)])
+    db.session.commit()
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+def breakdown(model, provider, tuples):
+    db.session.expunge_all()
+    if tuples:
+        rows, query_ms = timed(lambda: model.query.with_entities(*serialize_columns(model)).order_by(model.id).all())
+        data, build_ms = timed(lambda: [dict(row._mapping) for row in rows])
+    else:
+        rows, query_ms = timed(lambda: model.query.order_by(model.id).all())
+        data, build_ms = timed(lambda: [row.serialize() for row in rows])
+    _, encode_ms = timed(lambda: provider.dumps({"results": data, "next": None}))
+    return query_ms, build_ms, encode_ms
+
+def request_ms(path, provider):
+    app.json = provider
+    client = app.test_client()
+    _, elapsed = timed(lambda: client.get(path + '?limit=all'))
+    return elapsed
+
+def main(sizes):
+    stdlib = DefaultJSONProvider(app)
+    fast = OrJSONProvider(app) if orjson is not None else stdlib
+    if orjson is None:
+        print("orjson is not installed, the fast path uses the stdlib encoder\n")
+
+    print("%-9s %8s  %-22s %9s %9s %9s %8s" % ("route", "rows", "path", "query ms", "dicts ms", "encode ms", "ser. %"))
+    with app.app_context():
+        for size in sizes:
+            seed(size)
+            for path, model in ROUTES:
+                for label, provider, tuples in [("orm + stdlib json", stdlib, False), ("with_entities + orjson", fast, True)]:
+                    query_ms, build_ms, encode_ms = breakdown(model, provider, tuples)
+                    share = 100 * (build_ms + encode_ms) / (query_ms + build_ms + encode_ms)
+                    print("%-9s %8d  %-22s %9.1f %9.1f %9.1f %7.1f%%" % (path, size, label, query_ms, build_ms, encode_ms, share))
+                print("%-9s %8d  full request: %.1f ms with stdlib json, %.1f ms with orjson" % (
+                    path, size, request_ms(path, stdlib), request_ms(path, fast)))
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
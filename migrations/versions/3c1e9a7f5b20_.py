@@ -0,0 +1,57 @@
+"""full text search index
+
+Revision ID: 3c1e9a7f5b20
+Revises: d022886d61d2
+Create Date: 2026-10-17 11:40:07.552918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1e9a7f5b20'
+down_revision = 'd022886d61d2'
+branch_labels = None
+depends_on = None
+
+# (table, column searched besides name), the position in this list is the kind encoded in the FTS5 rowid
+SEARCHABLE = [
+    ('characters', 'description'),
+    ('planets', 'description'),
+    ('vehicles', 'weaponry'),
+    ('political_groups', 'description'),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE search_index USING fts5(name, body, tokenize='porter unicode61')")
+        for kind, (table, column) in enumerate(SEARCHABLE):
+            rowid = "%s.id * %d + %d" % ('{row}', len(SEARCHABLE), kind)
+            insert = "INSERT INTO search_index(rowid, name, body) VALUES (%s, new.name, coalesce(new.%s, ''));" % (rowid.format(row='new'), column)
+            delete = "DELETE FROM search_index WHERE rowid = %s;" % rowid.format(row='old')
+            op.execute("CREATE TRIGGER %s_search_insert AFTER INSERT ON %s BEGIN %s END" % (table, table, insert))
+            # only the indexed columns, other updates (favorite_count, timestamps) don't touch the index
+            op.execute("CREATE TRIGGER %s_search_update AFTER UPDATE OF name, %s ON %s BEGIN %s %s END" % (table, column, table, delete, insert))
+            op.execute("CREATE TRIGGER %s_search_delete AFTER DELETE ON %s BEGIN %s END" % (table, table, delete))
+            op.execute("INSERT INTO search_index(rowid, name, body) SELECT %s, name, coalesce(%s, '') FROM %s" % (rowid.format(row=table), column, table))
+    elif dialect == 'postgresql':
+        for table, column in SEARCHABLE:
+            op.execute(
+                "CREATE INDEX ix_%s_search ON %s USING GIN ((setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(%s, '')), 'B')))" % (table, table, column)
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for table, _ in SEARCHABLE:
+            for event in ('insert', 'update', 'delete'):
+                op.execute("DROP TRIGGER %s_search_%s" % (table, event))
+        op.execute("DROP TABLE search_index")
+    elif dialect == 'postgresql':
+        for table, _ in SEARCHABLE:
+            op.drop_index('ix_%s_search' % table, table_name=table)
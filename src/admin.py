@@ -1,22 +1,80 @@
+"""
+Flask-Admin at /admin, switched with the ENABLE_ADMIN setting (environment variable or create_app config):
+ - "lazy" (default): Flask-Admin is imported and its views are built on the first request to /admin
+ - "true": set up while the app boots, like before
+ - "false": no admin at all, for API only deployments
+"""
 import os
-from flask_admin import Admin
+import threading
+from flask import Flask
 from models import db, User, Planet, Character, FavoriteCharacter, FavoritePlanet, PoliticalGroup, Vehicle
-from flask_admin.contrib.sqla import ModelView
+
+ADMIN_PREFIX = '/admin'
 
 def setup_admin(app):
+    from flask_admin import Admin
+    from flask_admin.contrib.sqla import ModelView
+
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     app.config['FLASK_ADMIN_SWATCH'] = 'cerulean'
     admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3')
 
-    
+
     # Add your models here, for example this is how we add a the User model to the admin
     admin.add_view(ModelView(User, db.session))
     admin.add_view(ModelView(Planet, db.session))
-    
+
     admin.add_view(ModelView(Character, db.session))
     admin.add_view(ModelView(FavoriteCharacter, db.session))
     admin.add_view(ModelView(FavoritePlanet, db.session))
     admin.add_view(ModelView(PoliticalGroup, db.session))
     admin.add_view(ModelView(Vehicle, db.session))
     # You can duplicate that line to add mew models
-    # admin.add_view(ModelView(YourModelName, db.session))
\ No newline at end of file
+    # admin.add_view(ModelView(YourModelName, db.session))
+
+class LazyAdmin:
+    """
+    WSGI middleware that sends /admin requests to a separate flask app holding the admin, built on the first of them.
+    Flask doesn't allow registering blueprints once the main app has served requests, hence the separate app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.admin_app = None
+        self._lock = threading.Lock()
+
+    def _build_admin_app(self):
+        admin_app = Flask(self.app.import_name)
+        admin_app.config.update(self.app.config)
+        # the main app's engines, db.init_app() would open new ones: another pool for the same database,
+        # or another, empty database for an in-memory sqlite one. These are flask-sqlalchemy 3.0 internals,
+        # the Pipfile pins it to that series
+        admin_app.extensions['sqlalchemy'] = db
+        db._app_engines[admin_app] = db._app_engines[self.app]
+        admin_app.teardown_appcontext(db._teardown_session)
+        setup_admin(admin_app)
+        return admin_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path != ADMIN_PREFIX and not path.startswith(ADMIN_PREFIX + '/'):
+            return self.wsgi_app(environ, start_response)
+        if self.admin_app is None:
+            with self._lock:
+                if self.admin_app is None:
+                    self.admin_app = self._build_admin_app()
+        return self.admin_app.wsgi_app(environ, start_response)
+
+def _admin_mode(app):
+    return str(app.config.get('ENABLE_ADMIN', 'lazy')).lower()
+
+def admin_enabled(app):
+    return _admin_mode(app) in ('lazy', '1', 'true', 'yes')
+
+def init_admin(app):
+    mode = _admin_mode(app)
+    if mode == 'lazy':
+        app.wsgi_app = LazyAdmin(app)
+    elif mode in ('1', 'true', 'yes'):
+        setup_admin(app)
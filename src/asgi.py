@@ -0,0 +1,183 @@
+# ASGI entry point, the alternative to wsgi.py: `uvicorn asgi:application --app-dir ./src/ --workers 4`
+#
+# The hot reads (GET /people, /planets and their single entity routes) are served by async handlers on an async
+# engine, so a worker waiting on the database keeps serving other requests. They answer exactly like the flask
+# routes (pagination, filters, sorting, fields, ETags, the entity cache and compression), every other route is the
+# flask app itself mounted through a WSGI adapter. Requests with ?include= are handed to flask too, it does the
+# batched loading.
+#
+# Extra packages, the [asgi] category of the Pipfile: pipenv install --categories "packages asgi"
+# The async engine uses ASYNC_DATABASE_URL, or DATABASE_URL with its async driver (asyncpg, aiosqlite, aiomysql).
+# Requests served by the async handlers skip these parts of the flask app, which only see what is handed to flask:
+#  - replica routing: they always read the primary, DATABASE_REPLICA_URLS only applies to the flask routes
+#  - /metrics (RequestMetrics) doesn't count them, and the request recorder (RECORD_REQUESTS) doesn't record them
+# A pool timeout is the same 503 with Retry-After as on the flask routes.
+
+import os
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Route, Mount
+from werkzeug.http import http_date, quote_etag
+
+from app import app
+from cache import LRUCache, NullCache
+from db_pool import engine_options
+from json_provider import dumps_response
+from models import serialize_columns, Character, Planet
+from routes.common import collection_stamp, collection_etag, entity_stamp, stamp_matches, entity_validators, select_fields
+from utils import APIException, requested_fields, requested_sort, apply_filters, page_query, page_result, with_sort_field, http_last_modified, is_not_modified, \
+    matched_etag, coded_etag
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite', 'mysql': 'mysql+aiomysql'}
+
+def async_database_url(url):
+    scheme, rest = url.split('://', 1)
+    return ASYNC_DRIVERS.get(scheme.split('+')[0], scheme) + '://' + rest
+
+database_url = os.getenv('ASYNC_DATABASE_URL') or async_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+options = engine_options(database_url)
+# async engines come with their own asyncio queue pool
+options.pop('poolclass', None)
+engine = create_async_engine(database_url, **options)
+entity_cache = app.extensions['entity_cache']
+check_hits = app.extensions['entity_cache_checks']
+flask_application = WSGIMiddleware(app)
+
+compressor = app.extensions.get('compressor')
+
+async def cache_call(method, *args):
+    # redis (or any other network backend) blocks, it must not hold up the event loop
+    if isinstance(entity_cache, (LRUCache, NullCache)):
+        return method(*args)
+    return await run_in_threadpool(method, *args)
+
+def accepted_encoding(request):
+    return compressor.negotiate(request.headers.get('accept-encoding')) if compressor is not None else None
+
+def json_response(data, status_code, etag=None, last_modified=None, encoding=None, compressed=None):
+    """
+    Compressed like the flask responses (see compression.py) when encoding is given,
+    compressed is a body already compressed with it, taken from the compressor's cache.
+    """
+    headers = {"Access-Control-Allow-Origin": "*"}  # same default as flask_cors on the flask routes
+    body = None
+    if status_code != 304 and compressed is None:
+        body = dumps_response(app.json, data).encode()
+        if compressor is not None and status_code == 200 and len(body) >= compressor.min_size:
+            headers["Vary"] = "Accept-Encoding"
+            if encoding is not None:
+                compressed = compressor.encode(body, encoding, etag)
+    if compressed is not None:
+        body = compressed
+        headers["Vary"] = "Accept-Encoding"
+        headers["Content-Encoding"] = encoding
+    if etag is not None:
+        # one strong ETag per encoding, as in compression.py
+        headers["ETag"] = quote_etag(coded_etag(etag, headers.get("Content-Encoding")))
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    if status_code == 304:
+        return Response(status_code=304, headers=headers)
+    return Response(body, status_code=status_code, headers=headers, media_type='application/json')
+
+def cached_response(request, etag, last_modified):
+    encoding = accepted_encoding(request)
+    compressed = compressor.cached(etag, encoding) if compressor is not None else None
+    return json_response(None, 200, etag, last_modified, encoding, compressed) if compressed is not None else None
+
+async def list_collection(request, model):
+    args = request.query_params
+    if 'include' in args:
+        return flask_application
+    fields = requested_fields(model, args)
+    sort = requested_sort(model, args)
+    async with engine.connect() as connection:
+        stamp = (await connection.execute(collection_stamp(model))).one()
+        # no Last-Modified on collections, see routes.common.collection_validators
+        etag = collection_etag(model, stamp, args)
+        if is_not_modified(request.headers, etag, None):
+            return json_response(None, 304, matched_etag(request.headers, etag) or etag)
+        cached = cached_response(request, etag, None)
+        if cached is not None:
+            return cached
+
+        statement = apply_filters(select(*serialize_columns(model, with_sort_field(fields, sort))), model, args)
+        statement, limit = page_query(statement, model, sort, args)
+        rows = (await connection.execute(statement)).all()
+
+    rows, next_cursor = page_result(rows, limit, sort)
+    body = {"results": [select_fields(row._mapping, fields) for row in rows], "next": next_cursor}
+    return json_response(body, 200, etag, None, accepted_encoding(request))
+
+async def get_entity(request, model, kind, not_found):
+    if 'include' in request.query_params:
+        return flask_application
+    entity_id = request.path_params['entity_id']
+    fields = requested_fields(model, request.query_params)
+    # same cache and keys as the flask routes, so their PUT/DELETE handlers invalidate these reads too
+    key = '%s:%d' % (kind, entity_id)
+    entity = await cache_call(entity_cache.get, key)
+    if entity is None or check_hits:
+        async with engine.connect() as connection:
+            # a hit may predate a write handled by another worker, checked like routes.common.is_current does
+            if entity is not None and not stamp_matches(entity, (await connection.execute(entity_stamp(model, entity_id))).first()):
+                await cache_call(entity_cache.delete, key)
+                entity = None
+            if entity is None:
+                row = (await connection.execute(select(*serialize_columns(model)).where(model.id == entity_id))).first()
+                if row is None:
+                    return json_response({"error": not_found}, 404)
+                entity = dict(row._mapping)
+                await cache_call(entity_cache.set, key, entity)
+
+    etag, last_modified = entity_validators(kind, entity, request.query_params.get('fields', ''))
+    last_modified = http_last_modified(last_modified)
+    if is_not_modified(request.headers, etag, last_modified):
+        return json_response(None, 304, matched_etag(request.headers, etag) or etag, last_modified)
+    return cached_response(request, etag, last_modified) or \
+        json_response(select_fields(entity, fields), 200, etag, last_modified, accepted_encoding(request))
+
+async def get_all_people(request):
+    return await list_collection(request, Character)
+
+async def get_one_person(request):
+    return await get_entity(request, Character, 'people', "Character not found")
+
+async def get_all_planets(request):
+    return await list_collection(request, Planet)
+
+async def get_one_planet(request):
+    return await get_entity(request, Planet, 'planets', "Planet not found")
+
+async def handle_invalid_usage(request, error):
+    return json_response(error.to_dict(), error.status_code)
+
+async def handle_pool_timeout(request, error):
+    # same answer as factory.handle_pool_timeout
+    response = json_response({"error": "Database is busy, try again later"}, 503)
+    response.headers["Retry-After"] = "1"
+    return response
+
+@asynccontextmanager
+async def lifespan(application):
+    yield
+    await engine.dispose()
+
+# other methods on these paths (POST, PUT, DELETE, OPTIONS) don't match the GET routes and fall through to flask
+application = Starlette(
+    routes=[
+        Route('/people', get_all_people, methods=['GET']),
+        Route('/people/{entity_id:int}', get_one_person, methods=['GET']),
+        Route('/planets', get_all_planets, methods=['GET']),
+        Route('/planets/{entity_id:int}', get_one_planet, methods=['GET']),
+        Mount('/', flask_application),
+    ],
+    exception_handlers={APIException: handle_invalid_usage, PoolTimeoutError: handle_pool_timeout},
+    lifespan=lifespan,
+)
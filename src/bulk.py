@@ -0,0 +1,156 @@
+"""
+Chunked bulk create/update/delete used by the /<resource>/bulk endpoints.
+Every chunk of BULK_CHUNK_SIZE items is written with one executemany per statement and committed in its own transaction,
+so a failing chunk does not roll back the ones before it.
+"""
+import os
+import json
+from flask import request
+from sqlalchemy import insert, select, func, text
+from sqlalchemy.exc import SQLAlchemyError
+from models import db
+from utils import APIException
+
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 500))
+
+def read_bulk_items():
+    """Read the request body as a JSON array or as NDJSON (application/x-ndjson, one object per line)"""
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)  # reported back as an invalid item
+        return items
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise APIException("Expected a JSON array or an NDJSON body", status_code=400)
+    return items
+
+def _chunks(items):
+    for start in range(0, len(items), BULK_CHUNK_SIZE):
+        yield items[start:start + BULK_CHUNK_SIZE]
+
+def _is_id(value):
+    # true and false are ints to python, not ids
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _validate(item, fields):
+    if not isinstance(item, dict):
+        return "Item must be a JSON object"
+    if 'id' in item and not _is_id(item['id']):
+        return "'id' must be an integer"
+    unknown = set(item) - set(fields) - {'id'}
+    if unknown:
+        return "Unknown fields: " + ", ".join(sorted(unknown))
+    missing = [field for field in fields if field not in item]
+    if missing:
+        return "Missing fields: " + ", ".join(missing)
+    return None
+
+def _chunk_error(results, chunk, error):
+    db.session.rollback()
+    message = str(getattr(error, 'orig', error))
+    for index, _ in chunk:
+        results[index] = {"index": index, "status": 409, "error": message}
+
+def _insert_chunk(model, mappings):
+    """
+    Insert the mappings of one chunk with a single executemany, returns the generated ids in order.
+     - postgresql: the ids are drawn from the table's sequence first and inserted with the rows
+       (psycopg2 batches the executemany into multi-row INSERTs)
+     - sqlite: the rows get consecutive ids after the highest one, read back with max(id) before the commit,
+       the transaction holding the database write lock
+     - other databases: bulk_insert_mappings with return_defaults, which inserts row by row to read the ids back
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        ids = [row[0] for row in db.session.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+            {"table": model.__tablename__, "count": len(mappings)}
+        )]
+        db.session.execute(insert(model), [dict(mapping, id=entity_id) for mapping, entity_id in zip(mappings, ids)])
+        return ids
+    if dialect == 'sqlite':
+        db.session.execute(insert(model), mappings)
+        last_id = db.session.execute(select(func.max(model.id))).scalar()
+        return list(range(last_id - len(mappings) + 1, last_id + 1))
+    db.session.bulk_insert_mappings(model, mappings, return_defaults=True)
+    return [mapping['id'] for mapping in mappings]
+
+def bulk_upsert(model, fields, items):
+    """
+    Insert the items without an "id" and update the ones with an existing "id".
+    Returns one result per item, in the same order: {"index", "status", "id"} or {"index", "status", "error"}.
+    """
+    results = [None] * len(items)
+    inserts, updates = [], []
+    for index, item in enumerate(items):
+        error = _validate(item, fields)
+        if error:
+            results[index] = {"index": index, "status": 400, "error": error}
+        elif 'id' in item:
+            updates.append((index, item))
+        else:
+            inserts.append((index, item))
+
+    for chunk in _chunks(inserts):
+        try:
+            ids = _insert_chunk(model, [dict(item) for _, item in chunk])
+            db.session.commit()
+        except SQLAlchemyError as e:
+            _chunk_error(results, chunk, e)
+            continue
+        for (index, _), entity_id in zip(chunk, ids):
+            results[index] = {"index": index, "status": 201, "id": entity_id}
+
+    for chunk in _chunks(updates):
+        ids = [item['id'] for _, item in chunk]
+        existing = {row.id for row in db.session.query(model.id).filter(model.id.in_(ids))}
+        found = []
+        for index, item in chunk:
+            if item['id'] in existing:
+                found.append((index, item))
+            else:
+                results[index] = {"index": index, "status": 404, "error": "Not found"}
+        try:
+            db.session.bulk_update_mappings(model, [item for _, item in found])
+            db.session.commit()
+        except SQLAlchemyError as e:
+            _chunk_error(results, found, e)
+            continue
+        for index, item in found:
+            results[index] = {"index": index, "status": 200, "id": item['id']}
+
+    return results
+
+def bulk_delete(model, ids):
+    """Delete the rows with the given ids, one result per id: 200 when deleted, 404 when missing"""
+    results = [None] * len(ids)
+    valid = []
+    for index, entity_id in enumerate(ids):
+        if _is_id(entity_id):
+            valid.append((index, entity_id))
+        else:
+            results[index] = {"index": index, "status": 400, "error": "Id must be an integer"}
+
+    for chunk in _chunks(valid):
+        chunk_ids = [entity_id for _, entity_id in chunk]
+        try:
+            existing = {row.id for row in db.session.query(model.id).filter(model.id.in_(chunk_ids))}
+            model.query.filter(model.id.in_(chunk_ids)).delete(synchronize_session=False)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            _chunk_error(results, chunk, e)
+            continue
+        for index, entity_id in chunk:
+            if entity_id in existing:
+                results[index] = {"index": index, "status": 200, "id": entity_id}
+            else:
+                results[index] = {"index": index, "status": 404, "error": "Not found"}
+
+    return results
@@ -0,0 +1,142 @@
+"""
+Read-through cache for the single entity GET endpoints.
+The backend is picked with the CACHE_BACKEND env variable:
+ - "memory" (default): LRU with TTL living inside each worker process
+ - "redis": shared between workers and instances, needs CACHE_URL
+ - "none": disables caching
+Any object with get/set/delete/clear can be used as a backend (for example a LRUCache stand-in for redis).
+
+Writes through the API evict their keys, but from the memory cache of the worker that handled them only, and edits
+made elsewhere (the admin, scripts, another instance) evict nothing. CACHE_CHECK_HITS picks what is done about it:
+ - "auto" (default): hits of the memory backend are checked against the row's timestamps (one primary key lookup,
+   see routes.common.is_current), redis hits are not, every worker sees the evictions there
+ - "true" / "false": always / never check
+Without checks an entity can be served up to CACHE_TTL seconds (default 60) after a write the cache didn't see:
+on every worker but the writer's with the memory backend, after edits outside the API with redis.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Entries expire after ttl seconds, the least recently used ones are dropped past max_entries (None: no limit).
+    With max_bytes the values must be bytes, their total length is kept under it too and a longer value isn't stored.
+    """
+    def __init__(self, max_entries=1024, ttl=60, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _size(self, value):
+        return len(value) if self.max_bytes is not None else 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._size(entry[1])
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._pop(key)
+            size = self._size(value)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._bytes += size
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+class RedisCache:
+    def __init__(self, url, ttl=60, prefix='starwars:'):
+        import redis  # optional dependency, only needed when CACHE_BACKEND=redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+class NullCache:
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+def make_cache():
+    backend = os.getenv('CACHE_BACKEND', 'memory')
+    ttl = int(os.getenv('CACHE_TTL', 60))
+    if backend == 'redis':
+        return RedisCache(os.getenv('CACHE_URL', 'redis://localhost:6379/0'), ttl=ttl)
+    if backend == 'none':
+        return NullCache()
+    return LRUCache(max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 1024)), ttl=ttl)
+
+def checks_hits(cache, setting):
+    """Whether the hits of this cache must be checked against the database, for a CACHE_CHECK_HITS setting"""
+    setting = str(setting).lower()
+    if setting == 'auto':
+        return isinstance(cache, LRUCache)
+    return setting in ('1', 'true', 'yes')
+
+def read_through(cache, key, loader, is_current=None):
+    """
+    Return the cached value for key, calling loader() on a miss.
+    is_current(value) can check a hit against the source, a stale value is dropped and loaded again.
+    None results (entity not found) are not cached so new rows show up right away.
+    """
+    value = cache.get(key)
+    if value is not None and is_current is not None and not is_current(value):
+        cache.delete(key)
+        value = None
+    if value is None:
+        value = loader()
+        if value is not None:
+            cache.set(key, value)
+    return value
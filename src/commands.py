@@ -0,0 +1,15 @@
+"""
+Maintenance commands, run them with `flask <command>` (FLASK_APP=src/app.py) or `pipenv run <script>`.
+"""
+import click
+from flask.cli import with_appcontext
+from models import db, reconcile_favorite_counts, Character, Planet, FavoriteCharacter, FavoritePlanet
+
+@click.command('reconcile-favorites')
+@with_appcontext
+def reconcile_favorites_command():
+    """Rebuild the favorite_count of every character and planet from the favorites tables."""
+    for model, favorite_model, entity_column in ((Character, FavoriteCharacter, 'character_id'), (Planet, FavoritePlanet, 'planet_id')):
+        fixed = reconcile_favorite_counts(model, favorite_model, entity_column)
+        db.session.commit()
+        click.echo("%s: %d favorite counts fixed" % (model.__tablename__, fixed))
@@ -0,0 +1,114 @@
+"""
+Negotiated response compression: zstd, br or gzip, whichever the client's Accept-Encoding prefers (ours on ties).
+ - COMPRESS_ALGORITHMS: encodings offered, in server preference order (default "zstd,br,gzip"). zstd and br need
+   the optional zstandard and brotli packages and are left out when they are not installed
+ - COMPRESS_MIN_SIZE: smaller bodies are sent as is (default 1024 bytes), the gain wouldn't pay for the CPU
+ - COMPRESS_LEVEL_GZIP / COMPRESS_LEVEL_BR / COMPRESS_LEVEL_ZSTD: size vs CPU (defaults 6, 4 and 3)
+ - COMPRESS_CACHE_BYTES: memory for the compressed bodies kept per worker (default 16 MiB, 0 disables the cache),
+   the least recently used ones go first. They are kept for at most COMPRESS_CACHE_TTL seconds (default 300)
+ - COMPRESS_CACHE_MAX_BODY: compressed bodies longer than this are not kept (default 1 MiB), one ?limit=all export
+   would push out every page
+
+Responses with an ETag (collections and single entities, see utils.conditional_response) are compressed once per
+representation and encoding: while the ETag doesn't change, the stored compressed body is sent again without
+running the query or the serialization. Streamed responses (the NDJSON exports) are not compressed.
+Compressed responses keep a strong ETag, one per encoding ("<etag>-gzip", see utils.coded_etag): the bytes differ
+from the uncompressed ones. If-None-Match accepts the tag in any encoding and the 304 carries the one the client sent.
+"""
+import gzip
+from flask import request
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+from cache import LRUCache
+from utils import coded_etag
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+def available_encoders(levels):
+    """Compression function per encoding for the installed libraries, levels is {encoding: level}"""
+    encoders = {'gzip': lambda data: gzip.compress(data, compresslevel=levels['gzip'], mtime=0)}
+    if brotli is not None:
+        encoders['br'] = lambda data: brotli.compress(data, quality=levels['br'])
+    if zstandard is not None:
+        # a compressor object can't be shared between threads, it is cheap to create
+        encoders['zstd'] = lambda data: zstandard.ZstdCompressor(level=levels['zstd']).compress(data)
+    return encoders
+
+class ResponseCompressor:
+    def init_app(self, app):
+        levels = {'gzip': app.config['COMPRESS_LEVEL_GZIP'], 'br': app.config['COMPRESS_LEVEL_BR'], 'zstd': app.config['COMPRESS_LEVEL_ZSTD']}
+        encoders = available_encoders(levels)
+        offered = [name.strip() for name in app.config['COMPRESS_ALGORITHMS'].split(',') if name.strip()]
+        self.encoders = {name: encoders[name] for name in offered if name in encoders}
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        max_bytes = app.config['COMPRESS_CACHE_BYTES']
+        self.max_cached_body = min(app.config['COMPRESS_CACHE_MAX_BODY'], max_bytes)
+        # the ETag already tells when an entry is stale, the TTL only bounds how long an unused one stays around
+        self.cache = LRUCache(max_entries=None, ttl=app.config['COMPRESS_CACHE_TTL'], max_bytes=max_bytes) if max_bytes else None
+        if not self.encoders:
+            return
+        # registered after the metrics, so the response size they observe is the compressed one
+        app.after_request(self._compress)
+        app.extensions['compressor'] = self
+
+    def negotiate(self, accept_encoding):
+        """Encoding to use for an Accept-Encoding header value, None to send the body as is"""
+        if not accept_encoding:
+            return None
+        return parse_accept_header(accept_encoding, Accept).best_match(list(self.encoders))
+
+    def encode(self, body, encoding, etag=None):
+        """Compressed body, from the cache when this representation (etag) was compressed before"""
+        if etag is None or self.cache is None:
+            return self.encoders[encoding](body)
+        key = '%s:%s' % (encoding, etag)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self.encoders[encoding](body)
+            if len(compressed) <= self.max_cached_body:
+                self.cache.set(key, compressed)
+        return compressed
+
+    def cached(self, etag, encoding):
+        if self.cache is None or encoding is None:
+            return None
+        return self.cache.get('%s:%s' % (encoding, etag))
+
+    def cached_response(self, etag, response_class):
+        """The stored compressed JSON response of this ETag for the current request's encoding, or None"""
+        encoding = self.negotiate(request.headers.get('Accept-Encoding'))
+        body = self.cached(etag, encoding)
+        if body is None:
+            return None
+        response = response_class(body, mimetype='application/json')
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def compressible(self, response):
+        return (response.status_code == 200 and not response.direct_passthrough and not response.is_streamed
+                and 'Content-Encoding' not in response.headers and response.mimetype.startswith(COMPRESSIBLE_TYPES)
+                and (response.content_length or 0) >= self.min_size)
+
+    def _compress(self, response):
+        if self.compressible(response):
+            encoding = self.negotiate(request.headers.get('Accept-Encoding'))
+            # the representation depends on the header even when it is sent as is
+            response.vary.add('Accept-Encoding')
+            if encoding is not None:
+                etag, _ = response.get_etag()
+                response.set_data(self.encode(response.get_data(), encoding, etag))
+                response.headers['Content-Encoding'] = encoding
+                if etag:
+                    response.set_etag(coded_etag(etag, encoding))
+        return response
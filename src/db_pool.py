@@ -0,0 +1,89 @@
+"""
+Connection pool settings from the environment and the stats behind /health/db.
+ - DB_POOL_SIZE, DB_MAX_OVERFLOW: connections kept open per worker, and extra ones allowed under load
+ - DB_POOL_TIMEOUT: seconds to wait for a free connection before failing the request with a 503
+ - DB_POOL_RECYCLE: seconds after which a connection is replaced (-1 to never recycle)
+ - DB_POOL_PRE_PING: test connections with a ping on checkout, to survive database restarts
+"""
+import os
+import threading
+import time
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self):
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(1000 * self.total_wait / waits, 3) if waits else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait, 3)
+            }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures how long requests wait for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+def engine_options(database_uri):
+    options = {
+        "pool_pre_ping": _env_bool('DB_POOL_PRE_PING', 'true'),
+        "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+    # sqlite manages its own connections, sizing a queue pool only makes sense for server databases
+    if not database_uri.startswith('sqlite'):
+        options.update({
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": int(os.getenv('DB_POOL_SIZE', 5)),
+            "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            "pool_timeout": float(os.getenv('DB_POOL_TIMEOUT', 5)),
+        })
+    return options
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "timeout_seconds": pool.timeout()
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        status["wait"] = pool.stats.to_dict()
+    return status
@@ -0,0 +1,94 @@
+"""
+Read replica routing, enabled by the DATABASE_REPLICA_URLS setting (comma separated).
+GET/HEAD requests run on a replica picked with DATABASE_REPLICA_STRATEGY ("round_robin" or "least_connections"),
+everything else runs on the primary. A client that just wrote is pinned to the primary for READ_YOUR_WRITES_SECONDS
+with a cookie, so it never reads from a replica that hasn't caught up with its write yet.
+"""
+import time
+import itertools
+import threading
+from contextlib import contextmanager
+from flask import g, request, current_app, has_app_context
+from flask_sqlalchemy.session import Session
+
+PRIMARY_COOKIE = 'read_primary_until'
+READ_METHODS = ('GET', 'HEAD')
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = g.get('db_replica') if has_app_context() else None
+        if bind is None and replica is not None and not self._flushing:
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def primary_only(view):
+    """Endpoints decorated with this always read from the primary"""
+    view.primary_only = True
+    return view
+
+@contextmanager
+def use_primary():
+    """Run the block on the primary even inside a request routed to a replica"""
+    replica = g.pop('db_replica', None)
+    try:
+        yield
+    finally:
+        if replica is not None:
+            g.db_replica = replica
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replicas = []
+
+    def init_app(self, app, engine_options):
+        """Must run before db.init_app(app), the replicas are registered as SQLALCHEMY_BINDS"""
+        urls = [url.strip() for url in (app.config.get('DATABASE_REPLICA_URLS') or '').split(',') if url.strip()]
+        if not urls:
+            return
+
+        self.strategy = app.config.get('DATABASE_REPLICA_STRATEGY', 'round_robin')
+        self.pin_seconds = int(app.config.get('READ_YOUR_WRITES_SECONDS', 5))
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        for index, url in enumerate(urls):
+            url = url.replace("postgres://", "postgresql://")
+            key = 'replica_%d' % index
+            binds[key] = dict(engine_options(url), url=url)
+            self.replicas.append(key)
+
+        self._lock = threading.Lock()
+        self._in_flight = {key: 0 for key in self.replicas}
+        self._round_robin = itertools.cycle(self.replicas)
+        app.before_request(self._choose_replica)
+        app.after_request(self._pin_writer)
+        app.teardown_request(self._release_replica)
+
+    def _pinned_to_primary(self):
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'primary_only', False):
+            return True
+        try:
+            return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _choose_replica(self):
+        if request.method not in READ_METHODS or self._pinned_to_primary():
+            return
+        with self._lock:
+            if self.strategy == 'least_connections':
+                replica = min(self.replicas, key=self._in_flight.get)
+            else:
+                replica = next(self._round_robin)
+            self._in_flight[replica] += 1
+        g.db_replica = g.db_replica_in_flight = replica
+
+    def _pin_writer(self, response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            response.set_cookie(PRIMARY_COOKIE, str(time.time() + self.pin_seconds), max_age=self.pin_seconds, httponly=True)
+        return response
+
+    def _release_replica(self, error=None):
+        replica = g.pop('db_replica_in_flight', None)
+        if replica is not None:
+            with self._lock:
+                self._in_flight[replica] -= 1
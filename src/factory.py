@@ -0,0 +1,98 @@
+"""
+Application factory. Every create_app() call builds an independent app: its own config, engines, entity cache
+and replica router, so workers, tests and scripts can build as many as they need, for example one per test with
+an isolated in-memory database:
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "ENABLE_ADMIN": "false"})
+    with app.app_context():
+        db.create_all(bind_key=None)
+
+`config` overrides the settings read from the environment.
+"""
+import os
+from flask import Flask, jsonify
+from flask_migrate import Migrate
+from flask_cors import CORS
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import configure_mappers
+from utils import APIException
+from cache import make_cache, checks_hits
+from search import include_object
+from db_pool import engine_options
+from db_routing import ReplicaRouter
+from admin import init_admin
+from json_provider import make_json_provider
+from metrics import RequestMetrics
+from recorder import RequestRecorder
+from compression import ResponseCompressor
+from models import db
+from routes import blueprints
+from commands import reconcile_favorites_command
+
+migrate = Migrate(db=db, include_object=include_object)
+
+def database_url():
+    db_url = os.getenv("DATABASE_URL")
+    if db_url is not None:
+        return db_url.replace("postgres://", "postgresql://")
+    return "sqlite:////tmp/test.db"
+
+# Handle/serialize errors like a JSON object
+def handle_invalid_usage(error):
+    return jsonify(error.to_dict()), error.status_code
+
+# no free database connection within DB_POOL_TIMEOUT: fail fast instead of piling up blocked workers
+def handle_pool_timeout(error):
+    db.session.rollback()
+    return jsonify({"error": "Database is busy, try again later"}), 503, {"Retry-After": "1"}
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.url_map.strict_slashes = False
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DATABASE_REPLICA_URLS'] = os.getenv('DATABASE_REPLICA_URLS', '')
+    app.config['DATABASE_REPLICA_STRATEGY'] = os.getenv('DATABASE_REPLICA_STRATEGY', 'round_robin')
+    app.config['READ_YOUR_WRITES_SECONDS'] = int(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
+    app.config['ENABLE_ADMIN'] = os.getenv('ENABLE_ADMIN', 'lazy')
+    app.config['SLOW_REQUEST_MS'] = float(os.getenv('SLOW_REQUEST_MS', 500))
+    app.config['RECORD_REQUESTS'] = os.getenv('RECORD_REQUESTS')
+    app.config['RECORD_SAMPLE_RATE'] = float(os.getenv('RECORD_SAMPLE_RATE', 0.1))
+    app.config['RECORD_MAX_BODY'] = int(os.getenv('RECORD_MAX_BODY', 1024 * 1024))
+    app.config['CACHE_CHECK_HITS'] = os.getenv('CACHE_CHECK_HITS', 'auto')
+    app.config['COMPRESS_ALGORITHMS'] = os.getenv('COMPRESS_ALGORITHMS', 'zstd,br,gzip')
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    app.config['COMPRESS_LEVEL_GZIP'] = int(os.getenv('COMPRESS_LEVEL_GZIP', 6))
+    app.config['COMPRESS_LEVEL_BR'] = int(os.getenv('COMPRESS_LEVEL_BR', 4))
+    app.config['COMPRESS_LEVEL_ZSTD'] = int(os.getenv('COMPRESS_LEVEL_ZSTD', 3))
+    app.config['COMPRESS_CACHE_BYTES'] = int(os.getenv('COMPRESS_CACHE_BYTES', 16 * 1024 * 1024))
+    app.config['COMPRESS_CACHE_MAX_BODY'] = int(os.getenv('COMPRESS_CACHE_MAX_BODY', 1024 * 1024))
+    app.config['COMPRESS_CACHE_TTL'] = int(os.getenv('COMPRESS_CACHE_TTL', 300))
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+    app.json = make_json_provider(app)
+
+    replica_router = ReplicaRouter()
+    replica_router.init_app(app, engine_options)
+    app.extensions['replica_router'] = replica_router
+    app.extensions['entity_cache'] = make_cache()
+    app.extensions['entity_cache_checks'] = checks_hits(app.extensions['entity_cache'], app.config['CACHE_CHECK_HITS'])
+    RequestMetrics().init_app(app)
+    RequestRecorder().init_app(app)
+    ResponseCompressor().init_app(app)
+
+    migrate.init_app(app)
+    db.init_app(app)
+    CORS(app)
+    init_admin(app)
+
+    app.register_error_handler(APIException, handle_invalid_usage)
+    app.register_error_handler(PoolTimeoutError, handle_pool_timeout)
+    for blueprint in blueprints:
+        app.register_blueprint(blueprint)
+    app.cli.add_command(reconcile_favorites_command)
+
+    # set up the model relationships now instead of during the first query, once in the master with preload_app
+    configure_mappers()
+    return app
@@ -0,0 +1,58 @@
+# Gunicorn settings, loaded by `gunicorn wsgi --chdir ./src/ --config ./src/gunicorn.conf.py` (Procfile and render.yaml).
+# Defaults scale with the CPUs available to the process, every setting can be overridden from the environment:
+#  - GUNICORN_WORKER_CLASS: "gthread" (default), "sync" or "gevent" (pipenv install gevent psycogreen)
+#  - WEB_CONCURRENCY: worker processes, defaults to cpus + 1 for gthread/gevent and 2 * cpus + 1 for sync
+#  - GUNICORN_THREADS: threads per gthread worker (default 4)
+#  - GUNICORN_WORKER_CONNECTIONS: greenlets per gevent worker (default DB_POOL_SIZE + DB_MAX_OVERFLOW)
+#  - GUNICORN_PRELOAD: import the app once in the master and fork it (default on, off for gevent)
+#  - GUNICORN_KEEPALIVE, GUNICORN_TIMEOUT: seconds
+#  - GUNICORN_MAX_REQUESTS, GUNICORN_MAX_REQUESTS_JITTER: recycle workers after that many requests, jittered so they don't all restart at once
+#
+# Each thread or greenlet needs its own database connection: keep threads (or worker connections) at or below
+# DB_POOL_SIZE + DB_MAX_OVERFLOW, past that requests wait for a connection and fail with a 503 after DB_POOL_TIMEOUT.
+
+import os
+
+def _cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return os.cpu_count() or 1
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', 2 * _cpus() + 1 if worker_class == 'sync' else _cpus() + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', int(os.getenv('DB_POOL_SIZE', 5)) + int(os.getenv('DB_MAX_OVERFLOW', 10))))
+
+# gevent has to patch the standard library before the app is imported, preloading would import it unpatched
+preload_app = _env_bool('GUNICORN_PRELOAD', 'false' if worker_class == 'gevent' else 'true')
+
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = timeout
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+# the worker heartbeat file, on a disk backed /tmp a slow disk can get workers killed (docker, cloud hosts)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:  # optional dependency, without it psycopg2 blocks the whole worker on every query
+            server.log.warning("psycogreen is not installed, postgres queries will block gevent workers")
+
+    if preload_app:
+        # connections opened in the master while importing the app would be shared by every worker:
+        # forget them in the child without closing them, the master and the other workers still own them
+        from app import app
+        from models import db
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
@@ -0,0 +1,45 @@
+"""
+Response JSON encoding. Uses orjson when it is installed and falls back to Flask's stdlib json provider otherwise,
+set JSON_ENCODER=stdlib to force the fallback. The output is the same with both (sorted keys, HTTP dates).
+"""
+import os
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+class OrJSONProvider(DefaultJSONProvider):
+    # datetimes go through DefaultJSONProvider.default so they keep the same format as the stdlib provider
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # indent, separators... are only supported by the stdlib encoder
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            # pretty printed output for debugging
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.options | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def dumps_response(provider, obj):
+    """Response body the way jsonify() renders it outside of debug mode, for code that builds responses without flask"""
+    if isinstance(provider, OrJSONProvider):
+        return provider.dumps(obj) + "\n"
+    return provider.dumps(obj, separators=(",", ":")) + "\n"
+
+def make_json_provider(app):
+    if orjson is not None and os.getenv('JSON_ENCODER', 'orjson') != 'stdlib':
+        return OrJSONProvider(app)
+    return DefaultJSONProvider(app)
@@ -0,0 +1,131 @@
+"""
+Request instrumentation exposed in the Prometheus text format on /metrics:
+ - http_request_duration_seconds: latency histogram per method, route and status
+ - http_response_size_bytes: response size histogram per method and route (streamed responses are not counted)
+ - http_request_sql_statements / http_request_sql_duration_seconds: SQL statements issued per request and their total time
+
+Requests slower than SLOW_REQUEST_MS are logged as warnings together with their SQL statements.
+Each worker process keeps its own metrics, with several gunicorn workers a scrape only sees the worker that answered it.
+Streamed responses (the /export endpoints) are timed until streaming starts, without the SQL run while streaming.
+"""
+import bisect
+import threading
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# statements kept per request for the slow request log
+MAX_LOGGED_STATEMENTS = 20
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        # the last slot counts the values above every bucket (+Inf)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+            series["counts"][index] += 1
+            series["sum"] += value
+
+    def render(self):
+        lines = ["# HELP %s %s" % (self.name, self.documentation), "# TYPE %s histogram" % self.name]
+        with self._lock:
+            series = [(labels, list(data["counts"]), data["sum"]) for labels, data in sorted(self._series.items())]
+        for labels, counts, total in series:
+            label_text = ','.join('%s="%s"' % (name, _escape(value)) for name, value in zip(self.labelnames, labels))
+            separator = ',' if label_text else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append('%s_bucket{%s%sle="%s"} %d' % (self.name, label_text, separator, bound, cumulative))
+            lines.append('%s_sum{%s} %r' % (self.name, label_text, total))
+            lines.append('%s_count{%s} %d' % (self.name, label_text, cumulative))
+        return "\n".join(lines)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # on the execution context, not conn.info: a failed statement never reaches after_cursor_execute,
+    # a start time stored on the connection would outlive it and be popped by the next statement
+    if context is not None and has_request_context() and 'sql_stats' in g:
+        context._query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_query_start', None)
+    if start is None or not has_request_context() or 'sql_stats' not in g:
+        return
+    duration = time.perf_counter() - start
+    stats = g.sql_stats
+    stats["count"] += 1
+    stats["time"] += duration
+    if len(stats["statements"]) < MAX_LOGGED_STATEMENTS:
+        stats["statements"].append((duration, statement))
+
+_listening = False
+
+def _listen_to_engines():
+    # class level listeners cover every engine (primary, replicas) of every app, once per process
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening = True
+
+class RequestMetrics:
+    def __init__(self):
+        self.latency = Histogram('http_request_duration_seconds', "Request latency", ('method', 'route', 'status'), LATENCY_BUCKETS)
+        self.size = Histogram('http_response_size_bytes', "Response body size", ('method', 'route'), SIZE_BUCKETS)
+        self.sql_count = Histogram('http_request_sql_statements', "SQL statements per request", ('method', 'route'), SQL_COUNT_BUCKETS)
+        self.sql_time = Histogram('http_request_sql_duration_seconds', "SQL time per request", ('method', 'route'), LATENCY_BUCKETS)
+
+    def init_app(self, app):
+        self.app = app
+        _listen_to_engines()
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.extensions['metrics'] = self
+
+    def _start(self):
+        g.request_start = time.perf_counter()
+        g.sql_stats = {"count": 0, "time": 0.0, "statements": []}
+
+    def _record(self, response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+        duration = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        labels = (request.method, route)
+        stats = g.sql_stats
+
+        self.latency.observe(labels + (str(response.status_code),), duration)
+        if response.content_length is not None:
+            self.size.observe(labels, response.content_length)
+        self.sql_count.observe(labels, stats["count"])
+        self.sql_time.observe(labels, stats["time"])
+
+        if duration * 1000 >= self.app.config['SLOW_REQUEST_MS']:
+            statements = "".join("\n  %.1f ms  %s" % (1000 * seconds, " ".join(statement.split())) for seconds, statement in stats["statements"])
+            self.app.logger.warning("Slow request %s %s: %.1f ms, %d SQL statements in %.1f ms%s",
+                                    request.method, request.full_path.rstrip('?'), 1000 * duration, stats["count"], 1000 * stats["time"], statements)
+        return response
+
+    def render(self):
+        return "\n".join(metric.render() for metric in (self.latency, self.size, self.sql_count, self.sql_time)) + "\n"
@@ -1,9 +1,43 @@
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import insert, update, select, func
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime
+from db_routing import RoutingSession
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+def serialize_columns(model, fields=None):
+    """Columns behind model.serialize(), to read plain rows with query.with_entities() instead of hydrating ORM objects"""
+    return [getattr(model, field) for field in fields or model.serialize_fields]
+
+def insert_ignoring_duplicates(model, index_elements):
+    """INSERT ... ON CONFLICT DO NOTHING on the unique index_elements (INSERT IGNORE on MySQL)"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect == 'sqlite':
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    return insert(model).prefix_with('IGNORE')
+
+def change_favorite_count(model, entity_id, delta):
+    """
+    Atomic favorite_count += delta of one character/planet, in the caller's transaction.
+    updated_at is kept: being favorited is not an edit of the entity, its ETag and cached copy stay valid.
+    """
+    statement = update(model).where(model.id == entity_id) \
+        .values(favorite_count=model.favorite_count + delta, updated_at=model.updated_at) \
+        .execution_options(synchronize_session=False)
+    db.session.execute(statement)
+
+def reconcile_favorite_counts(model, favorite_model, entity_column):
+    """Recount favorite_count from the favorites table in a single UPDATE, returns how many rows were off"""
+    actual = select(func.count(favorite_model.id)).where(getattr(favorite_model, entity_column) == model.id).scalar_subquery()
+    statement = update(model).where(model.favorite_count != actual) \
+        .values(favorite_count=actual, updated_at=model.updated_at) \
+        .execution_options(synchronize_session=False)
+    return db.session.execute(statement).rowcount
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -19,6 +53,7 @@ class User(db.Model):
     favorite_characters = db.relationship('FavoriteCharacter', back_populates='user')
     favorite_planets = db.relationship('FavoritePlanet', back_populates='user')
 
+    serialize_fields = ('id', 'first_name', 'last_name', 'email', 'joined_date', 'is_active')
 
     def __repr__(self):
         return '<User %r>' % self.email
@@ -34,13 +69,25 @@ class User(db.Model):
             # do not serialize the password, its a security breach
         }
     
-    def serialize_favorites(self):
+    def serialize_favorites(self, compact=False):
+        # one JOIN per favorite type instead of walking the relationships row by row
+        characters = Character.query.join(FavoriteCharacter).filter(FavoriteCharacter.user_id == self.id).order_by(FavoriteCharacter.id)
+        planets = Planet.query.join(FavoritePlanet).filter(FavoritePlanet.user_id == self.id).order_by(FavoritePlanet.id)
+
+        if compact:
+            favorites = {
+                "characters": [{"id": id, "name": name} for id, name in characters.with_entities(Character.id, Character.name)],
+                "planets": [{"id": id, "name": name} for id, name in planets.with_entities(Planet.id, Planet.name)]
+            }
+        else:
+            favorites = {
+                "characters": [character.serialize() for character in characters],
+                "planets": [planet.serialize() for planet in planets]
+            }
+
         result = {
             "user": self.serialize(),
-            "favorites": {
-                "characters": [fc.character.serialize() for fc in self.favorite_characters],
-                "planets": [fp.planet.serialize() for fp in self.favorite_planets]
-            }
+            "favorites": favorites
         }
         return result
     
@@ -61,11 +108,30 @@ class Character(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
     political_group_id = db.Column(db.Integer, db.ForeignKey('political_groups.id'))
+    # denormalized count of favorite_characters rows, see change_favorite_count()
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     favorite_characters = db.relationship('FavoriteCharacter', back_populates='character')
     political_group = db.relationship('PoliticalGroup', back_populates='members')
     vehicles = db.relationship('Vehicle', back_populates='character')
 
+    serialize_fields = ('id', 'name', 'description', 'species', 'homeworld', 'special_ability', 'affiliation', 'favorite_weapon',
+                        'eye_color', 'hair_color', 'birth_year', 'gender', 'created_at', 'updated_at')
+    filter_fields = ('affiliation', 'species', 'homeworld')
+    sort_fields = ('id', 'name', 'created_at')
+    # relationships that ?include= can embed
+    include_relationships = ('political_group', 'vehicles')
+
+    # every filter/sort index ends with the id, it is the keyset pagination tiebreaker
+    __table_args__ = (
+        db.Index('ix_characters_affiliation_id', 'affiliation', 'id'),
+        db.Index('ix_characters_species_id', 'species', 'id'),
+        db.Index('ix_characters_homeworld_id', 'homeworld', 'id'),
+        db.Index('ix_characters_name_id', 'name', 'id'),
+        db.Index('ix_characters_created_at_id', 'created_at', 'id'),
+        db.Index('ix_characters_favorite_count_id', 'favorite_count', 'id'),
+    )
+
     def __repr__(self):
         return '<Character %r>' % self.name
 
@@ -101,11 +167,27 @@ class Planet(db.Model):
     climate = db.Column(db.String(250))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    # denormalized count of favorite_planets rows, see change_favorite_count()
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
    
     favorite_planets = db.relationship('FavoritePlanet', back_populates='planet')
     vehicles = db.relationship('Vehicle', back_populates='planet')
 
+    serialize_fields = ('id', 'name', 'description', 'diameter', 'orbital_period', 'terrain_type', 'atmosphere', 'population',
+                        'climate', 'created_at', 'updated_at')
+    filter_fields = ('climate', 'terrain_type')
+    sort_fields = ('id', 'name', 'created_at')
+    include_relationships = ('vehicles',)
+
+    __table_args__ = (
+        db.Index('ix_planets_climate_id', 'climate', 'id'),
+        db.Index('ix_planets_terrain_type_id', 'terrain_type', 'id'),
+        db.Index('ix_planets_name_id', 'name', 'id'),
+        db.Index('ix_planets_created_at_id', 'created_at', 'id'),
+        db.Index('ix_planets_favorite_count_id', 'favorite_count', 'id'),
+    )
+
 
     def __repr__(self):
        return '<Planet %r>' % self.name
@@ -133,6 +215,12 @@ class FavoriteCharacter(db.Model):
     character = db.relationship('Character', back_populates='favorite_characters')
     user = db.relationship('User', back_populates='favorite_characters')
 
+    # the unique pair also serves the lookups by user_id, being its leftmost column
+    __table_args__ = (
+        db.Index('ix_favorite_characters_user_id_character_id', 'user_id', 'character_id', unique=True),
+        db.Index('ix_favorite_characters_character_id', 'character_id'),
+    )
+
     def __repr__(self):
          return '<FavoriteCharacter %r>' % self.id
 
@@ -144,6 +232,11 @@ class FavoritePlanet(db.Model):
     planet = db.relationship('Planet', back_populates='favorite_planets')
     user = db.relationship('User', back_populates='favorite_planets')
 
+    __table_args__ = (
+        db.Index('ix_favorite_planets_user_id_planet_id', 'user_id', 'planet_id', unique=True),
+        db.Index('ix_favorite_planets_planet_id', 'planet_id'),
+    )
+
     def __repr__(self):
        return '<FavoritePlanet %r>' % self.id
 
@@ -161,6 +254,10 @@ class PoliticalGroup(db.Model):
     enemies = db.Column(db.String(250))
     description = db.Column(db.String(500))
     members = db.relationship('Character', back_populates='political_group')
+
+    serialize_fields = ('id', 'name', 'leader', 'affiliation', 'allies', 'enemies', 'description')
+    # columns of the group when embedded in a character with ?include=
+    embed_fields = serialize_fields
     
     def __repr__(self):
         return '<FavoriteVehicle %r>' % self.name
@@ -193,18 +290,21 @@ class Vehicle(db.Model):
     planet = db.relationship('Planet', back_populates='vehicles')
     character = db.relationship('Character', back_populates='vehicles')
 
+    serialize_fields = ('id', 'name', 'type', 'manufacturer', 'crew_capacity', 'weaponry', 'model', 'planet', 'character')
+    serialize_relationships = ('planet', 'character')
+    # embedded in a character or planet with ?include=, the relationships are left out and the ids kept
+    embed_fields = ('id', 'name', 'type', 'manufacturer', 'crew_capacity', 'weaponry', 'model', 'planet_id', 'character_id')
+
     def __repr__(self):
          return '<FavoriteVehicle %r>' % self.name
 
-    def serialize(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "type": self.type,
-            "manufacturer": self.manufacturer,
-            "crew_capacity": self.crew_capacity,
-            "weaponry": self.weaponry,
-            "model": self.model,
-            "planet": self.planet.serialize() if self.planet else None,
-            "character": self.character.serialize() if self.character else None
-        }
+    def serialize(self, fields=None):
+        # only the requested fields are touched, so unrequested relationships are never lazy loaded
+        result = {}
+        for field in fields or self.serialize_fields:
+            if field in self.serialize_relationships:
+                related = getattr(self, field)
+                result[field] = related.serialize() if related else None
+            else:
+                result[field] = getattr(self, field)
+        return result
@@ -0,0 +1,101 @@
+"""
+Traffic recorder: appends a sample of the requests to a JSONL file, one object per line like requests.jsonl,
+to replay them later with benchmarks/replay.py. Enabled by RECORD_REQUESTS (path of the file), RECORD_SAMPLE_RATE
+is the share of requests recorded (default 0.1). Bodies above RECORD_MAX_BODY bytes are left out.
+Values of SENSITIVE_KEYS (passwords, tokens...) in JSON, NDJSON and form bodies and in the query string are
+replaced by REDACTED before anything is written, bodies in any other format are left out.
+
+    {"request_id": "...", "timestamp": 1760000000.123, "method": "GET", "path": "/people", "query": "limit=20",
+     "content_type": null, "body": null, "route": "/people", "status": 200, "duration_ms": 4.2}
+
+Every line is written with a single append, so several gunicorn workers can share the file.
+"""
+import os
+import json
+import random
+import time
+import uuid
+from urllib.parse import parse_qsl, urlencode
+from flask import g, request
+
+# a key containing any of these (case insensitive) has its value redacted
+SENSITIVE_KEYS = ('password', 'passwd', 'secret', 'token', 'api_key', 'apikey', 'authorization', 'credential')
+REDACTED = '[REDACTED]'
+
+def _is_sensitive(key):
+    key = str(key).lower()
+    return any(sensitive in key for sensitive in SENSITIVE_KEYS)
+
+def redact(value):
+    """Copy of a decoded JSON value with the values of the sensitive keys replaced, at any depth"""
+    if isinstance(value, dict):
+        return {key: REDACTED if _is_sensitive(key) else redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+def _redact_pairs(text):
+    pairs = parse_qsl(text, keep_blank_values=True)
+    if not any(_is_sensitive(key) for key, _ in pairs):
+        return text
+    return urlencode([(key, REDACTED if _is_sensitive(key) else value) for key, value in pairs])
+
+def redacted_body(body, mimetype):
+    """The body to record with its sensitive values redacted, None when it isn't in a format that can be redacted"""
+    try:
+        if mimetype == 'application/json' or mimetype.endswith('+json'):
+            return json.dumps(redact(json.loads(body)))
+        if mimetype == 'application/x-ndjson':
+            return "\n".join(json.dumps(redact(json.loads(line))) for line in body.splitlines() if line.strip())
+        if mimetype == 'application/x-www-form-urlencoded':
+            return _redact_pairs(body)
+    except ValueError:
+        pass
+    return None
+
+class RequestRecorder:
+    def init_app(self, app):
+        self.path = app.config.get('RECORD_REQUESTS')
+        if not self.path:
+            return
+        self.sample_rate = app.config['RECORD_SAMPLE_RATE']
+        self.max_body = app.config['RECORD_MAX_BODY']
+        # opened by the first recorded request, so every worker gets its own descriptor after the fork
+        self._fd = None
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.extensions['recorder'] = self
+
+    def _start(self):
+        if random.random() >= self.sample_rate:
+            return
+        g.recording = {
+            "request_id": request.headers.get('X-Request-Id') or uuid.uuid4().hex,
+            "timestamp": time.time(),
+            "method": request.method,
+            "path": request.path,
+            "query": _redact_pairs(request.query_string.decode('latin-1')),
+            "content_type": request.content_type,
+            "body": None,
+        }
+        if request.content_length and request.content_length <= self.max_body:
+            # cached by get_data, the view reads the same body afterwards
+            g.recording["body"] = redacted_body(request.get_data(as_text=True), request.mimetype)
+        g.recording_start = time.perf_counter()
+
+    def _record(self, response):
+        record = g.pop('recording', None)
+        if record is None:
+            return response
+        record.update({
+            "route": request.url_rule.rule if request.url_rule is not None else None,
+            "status": response.status_code,
+            "duration_ms": round(1000 * (time.perf_counter() - g.recording_start), 3),
+        })
+        self._write(record)
+        return response
+
+    def _write(self, record):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self._fd, (json.dumps(record) + "\n").encode())
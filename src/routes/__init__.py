@@ -0,0 +1,4 @@
+"""API routes, one blueprint per resource, registered on every app built by create_app()"""
+from routes import root, people, planets, users, political_groups, vehicles
+
+blueprints = [root.bp, people.bp, planets.bp, users.bp, political_groups.bp, vehicles.bp]
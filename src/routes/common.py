@@ -0,0 +1,117 @@
+"""
+Helpers shared by the resource blueprints (and the async handlers in asgi.py): entity cache, ETags, field selection,
+embedded relationships.
+"""
+import hashlib
+from urllib.parse import urlencode
+from flask import request, current_app
+from sqlalchemy import func, select
+from sqlalchemy.orm import load_only, selectinload
+from cache import read_through
+from models import db
+
+def entity_cache():
+    """Cache of the single entity GETs of the current app, every write to those entities must invalidate its key"""
+    return current_app.extensions['entity_cache']
+
+def load_serialized(model, entity_id):
+    entity = model.query.get(entity_id)
+    return entity.serialize() if entity else None
+
+def entity_stamp(model, entity_id):
+    return select(model.created_at, model.updated_at).where(model.id == entity_id)
+
+def stamp_matches(entity, stamp):
+    # created_at too: sqlite reuses the id of a deleted last row
+    return stamp is not None and (entity['created_at'], entity['updated_at']) == tuple(stamp)
+
+def is_current(model, entity):
+    """
+    Whether a cached serialized entity is still the row in the database: a primary key lookup of its timestamps,
+    much cheaper than loading and serializing the row. Catches the writes other workers and the admin made.
+    Like the fill, it runs on the request's replica: an entity cached from the primary and a lagging replica
+    just don't match, and the entity is loaded again.
+    """
+    return stamp_matches(entity, db.session.execute(entity_stamp(model, entity['id'])).first())
+
+def cached_entity(model, kind, entity_id):
+    """Serialized entity through the entity cache, None when it doesn't exist. Hits are checked when CACHE_CHECK_HITS says so"""
+    checked = current_app.extensions['entity_cache_checks']
+    return read_through(entity_cache(), '%s:%d' % (kind, entity_id), lambda: load_serialized(model, entity_id),
+                        (lambda entity: is_current(model, entity)) if checked else None)
+
+def entity_validators(kind, entity, fields_param):
+    last_modified = entity['updated_at'] or entity['created_at']
+    stamp = last_modified.isoformat() if last_modified else ''
+    # a sparse fieldset is a different representation, so it gets its own etag
+    return '%s-%d-%s-%s' % (kind, entity['id'], stamp, fields_param), last_modified
+
+def select_fields(entity, fields):
+    return {field: entity[field] for field in fields}
+
+def invalidate_bulk_results(kind, results):
+    for result in results:
+        if result['status'] == 200:
+            entity_cache().delete('%s:%d' % (kind, result['id']))
+
+def collection_stamp(model):
+    # cheap aggregate instead of hashing the rendered body: any insert, update or delete changes it
+    return select(
+        func.count(model.id),
+        func.max(model.id),
+        func.max(func.coalesce(model.updated_at, model.created_at))
+    )
+
+# the params a collection page depends on, besides the model.filter_fields
+COLLECTION_PARAMS = ('fields', 'sort', 'include', 'limit', 'after')
+
+def collection_params(model, args):
+    """
+    The query params that select the page, in a fixed order: unknown params (cache busters, tracking tags) and
+    their order don't make another ETag, or another compressed body in the cache.
+    """
+    params = [(name, args.get(name)) for name in COLLECTION_PARAMS if args.get(name) is not None]
+    params += [(field, value) for field in model.filter_fields for value in args.getlist(field)]
+    return urlencode(params)
+
+def collection_etag(model, stamp_row, args):
+    count, max_id, last_modified = stamp_row
+    stamp = last_modified.isoformat() if last_modified else ''
+    key = '%s:%s:%s:%s:%s' % (model.__tablename__, count, max_id, stamp, collection_params(model, args))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def collection_validators(model):
+    """
+    ETag of a collection. There is no Last-Modified: the newest timestamp doesn't move when a row is deleted,
+    If-Modified-Since would keep deleted rows alive on the client. The count in the ETag does change.
+    """
+    return collection_etag(model, db.session.execute(collection_stamp(model)).one(), request.args)
+
+def included_query(model, fields, includes):
+    """
+    ORM query of the requested fields with the ?include= relationships, each one loaded by a single
+    SELECT ... WHERE key IN (...) for all the rows at once: 1 + len(includes) statements whatever the page size.
+    """
+    names = list(fields)
+    options = []
+    for name in includes:
+        relationship = getattr(model, name)
+        # the key the batch is looked up by (political_group_id, or the id for the one-to-many ones)
+        names += [column.key for column in relationship.property.local_columns]
+        target = relationship.property.mapper.class_
+        options.append(selectinload(relationship).load_only(*[getattr(target, field) for field in target.embed_fields]))
+    columns = [getattr(model, name) for name in dict.fromkeys(names)]
+    return model.query.options(load_only(*columns), *options)
+
+def embed(entity):
+    return {field: getattr(entity, field) for field in entity.embed_fields}
+
+def serialize_included(entity, fields, includes):
+    result = {field: getattr(entity, field) for field in fields}
+    for name in includes:
+        related = getattr(entity, name)
+        if isinstance(related, list):
+            result[name] = [embed(item) for item in related]
+        else:
+            result[name] = embed(related) if related is not None else None
+    return result
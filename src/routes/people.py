@@ -0,0 +1,128 @@
+from flask import Blueprint, request, jsonify
+from utils import paginate, conditional_response, stream_ndjson, requested_fields, requested_includes, apply_filters, requested_sort, \
+    with_sort_field
+from bulk import read_bulk_items, bulk_upsert, bulk_delete
+from models import db, serialize_columns, Character
+from routes.common import entity_cache, cached_entity, entity_validators, select_fields, invalidate_bulk_results, collection_validators, \
+    included_query, serialize_included
+
+bp = Blueprint('people', __name__)
+
+# fields accepted by the bulk endpoints, same ones the single item POST/PUT require
+CHARACTER_FIELDS = ['name', 'description', 'species', 'homeworld', 'special_ability', 'affiliation', 'favorite_weapon', 'eye_color', 'hair_color', 'birth_year', 'gender']
+
+@bp.route('/people', methods=['GET'])
+def get_all_people():
+    fields = requested_fields(Character)
+    sort = requested_sort(Character)
+    includes = requested_includes(Character)
+    if includes:
+        # the embedded rows have no timestamps to build validators from, these responses go without ETag
+        query = apply_filters(included_query(Character, with_sort_field(fields, sort), includes), Character)
+        people, next_cursor = paginate(query, Character, sort)
+        return jsonify({"results": [serialize_included(person, fields, includes) for person in people], "next": next_cursor}), 200
+
+    def build():
+        query = apply_filters(Character.query, Character).with_entities(*serialize_columns(Character, with_sort_field(fields, sort)))
+        people, next_cursor = paginate(query, Character, sort)
+        return jsonify({"results": [select_fields(person._mapping, fields) for person in people], "next": next_cursor}), 200
+
+    return conditional_response(collection_validators(Character), None, build)
+
+# most favorited first, read from the (favorite_count, id) index instead of counting the favorites table
+@bp.route('/people/popular', methods=['GET'])
+def get_popular_people():
+    fields = requested_fields(Character)
+    query = apply_filters(Character.query, Character).with_entities(*serialize_columns(Character, fields), Character.favorite_count)
+    people, next_cursor = paginate(query, Character, (Character.favorite_count, True))
+    return jsonify({"results": [dict(person._mapping) for person in people], "next": next_cursor}), 200
+
+@bp.route('/people/export', methods=['GET'])
+def export_people():
+    query = Character.query.with_entities(*serialize_columns(Character, requested_fields(Character)))
+    return stream_ndjson(query, Character, lambda row: dict(row._mapping))
+
+@bp.route('/people/<int:people_id>', methods=['GET'])
+def get_one_person(people_id):
+    fields = requested_fields(Character)
+    includes = requested_includes(Character)
+    if includes:
+        # bypasses the entity cache, which holds the entity alone
+        person = included_query(Character, fields, includes).filter(Character.id == people_id).first()
+        if not person:
+            return jsonify({"error": "Character not found"}), 404
+        return jsonify(serialize_included(person, fields, includes)), 200
+
+    person = cached_entity(Character, 'people', people_id)
+    if not person:
+        return jsonify({"error": "Character not found"}), 404
+    etag, last_modified = entity_validators('people', person, request.args.get('fields', ''))
+    return conditional_response(etag, last_modified, lambda: (jsonify(select_fields(person, fields)), 200))
+
+@bp.route('/people', methods=['POST'])
+def add_character():
+    data = request.get_json()
+    new_character = Character(
+        name=data['name'],
+        description=data['description'],
+        species=data['species'],
+        homeworld=data['homeworld'],
+        special_ability=data['special_ability'],
+        affiliation=data['affiliation'],
+        favorite_weapon=data['favorite_weapon'],
+        eye_color=data['eye_color'],
+        hair_color=data['hair_color'],
+        birth_year=data['birth_year'],
+        gender=data['gender']
+    )
+    db.session.add(new_character)
+    db.session.commit()
+    return jsonify(new_character.serialize()), 201
+
+@bp.route('/people/<int:people_id>', methods=['PUT'])
+def update_character(people_id):
+    data = request.get_json()
+    character = Character.query.get(people_id)
+    
+    if not character:
+        return jsonify({"error": "Character not found"}), 404
+    
+    character.name = data['name']
+    character.description = data['description']
+    character.species = data['species']
+    character.homeworld = data['homeworld']
+    character.special_ability = data['special_ability']
+    character.affiliation = data['affiliation']
+    character.favorite_weapon = data['favorite_weapon']
+    character.eye_color = data['eye_color']
+    character.hair_color = data['hair_color']
+    character.birth_year = data['birth_year']
+    character.gender = data['gender']
+    db.session.commit()
+    entity_cache().delete('people:%d' % people_id)
+    
+    return jsonify(character.serialize()), 200
+
+@bp.route('/people/<int:people_id>', methods=['DELETE'])
+def delete_character(people_id):
+    character = Character.query.get(people_id)
+    
+    if not character:
+        return jsonify({"error": "Character not found"}), 404
+    
+    db.session.delete(character)
+    db.session.commit()
+    entity_cache().delete('people:%d' % people_id)
+    return jsonify({"message": "Character deleted successfully"}), 200
+
+@bp.route('/people/bulk', methods=['POST'])
+def bulk_upsert_people():
+    results = bulk_upsert(Character, CHARACTER_FIELDS, read_bulk_items())
+    invalidate_bulk_results('people', results)
+    return jsonify({"results": results}), 200
+
+@bp.route('/people/bulk', methods=['DELETE'])
+def bulk_delete_people():
+    results = bulk_delete(Character, read_bulk_items())
+    invalidate_bulk_results('people', results)
+    return jsonify({"results": results}), 200
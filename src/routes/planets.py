@@ -0,0 +1,122 @@
+from flask import Blueprint, request, jsonify
+from utils import paginate, conditional_response, stream_ndjson, requested_fields, requested_includes, apply_filters, requested_sort, \
+    with_sort_field
+from bulk import read_bulk_items, bulk_upsert, bulk_delete
+from models import db, serialize_columns, Planet
+from routes.common import entity_cache, cached_entity, entity_validators, select_fields, invalidate_bulk_results, collection_validators, \
+    included_query, serialize_included
+
+bp = Blueprint('planets', __name__)
+
+# fields accepted by the bulk endpoints, same ones the single item POST/PUT require
+PLANET_FIELDS = ['name', 'description', 'diameter', 'orbital_period', 'terrain_type', 'atmosphere', 'population', 'climate']
+
+@bp.route('/planets', methods=['GET'])
+def get_all_planets():
+    fields = requested_fields(Planet)
+    sort = requested_sort(Planet)
+    includes = requested_includes(Planet)
+    if includes:
+        # the embedded rows have no timestamps to build validators from, these responses go without ETag
+        query = apply_filters(included_query(Planet, with_sort_field(fields, sort), includes), Planet)
+        planets, next_cursor = paginate(query, Planet, sort)
+        return jsonify({"results": [serialize_included(planet, fields, includes) for planet in planets], "next": next_cursor}), 200
+
+    def build():
+        query = apply_filters(Planet.query, Planet).with_entities(*serialize_columns(Planet, with_sort_field(fields, sort)))
+        planets, next_cursor = paginate(query, Planet, sort)
+        return jsonify({"results": [select_fields(planet._mapping, fields) for planet in planets], "next": next_cursor}), 200
+
+    return conditional_response(collection_validators(Planet), None, build)
+
+# most favorited first, read from the (favorite_count, id) index instead of counting the favorites table
+@bp.route('/planets/popular', methods=['GET'])
+def get_popular_planets():
+    fields = requested_fields(Planet)
+    query = apply_filters(Planet.query, Planet).with_entities(*serialize_columns(Planet, fields), Planet.favorite_count)
+    planets, next_cursor = paginate(query, Planet, (Planet.favorite_count, True))
+    return jsonify({"results": [dict(planet._mapping) for planet in planets], "next": next_cursor}), 200
+
+@bp.route('/planets/export', methods=['GET'])
+def export_planets():
+    query = Planet.query.with_entities(*serialize_columns(Planet, requested_fields(Planet)))
+    return stream_ndjson(query, Planet, lambda row: dict(row._mapping))
+
+@bp.route('/planets/<int:planet_id>', methods=['GET'])
+def get_one_planet(planet_id):
+    fields = requested_fields(Planet)
+    includes = requested_includes(Planet)
+    if includes:
+        # bypasses the entity cache, which holds the entity alone
+        planet = included_query(Planet, fields, includes).filter(Planet.id == planet_id).first()
+        if not planet:
+            return jsonify({"error": "Planet not found"}), 404
+        return jsonify(serialize_included(planet, fields, includes)), 200
+
+    planet = cached_entity(Planet, 'planets', planet_id)
+    if not planet:
+        return jsonify({"error": "Planet not found"}), 404
+    etag, last_modified = entity_validators('planets', planet, request.args.get('fields', ''))
+    return conditional_response(etag, last_modified, lambda: (jsonify(select_fields(planet, fields)), 200))
+
+@bp.route('/planets', methods=['POST'])
+def add_planet():
+    data = request.get_json()
+    new_planet = Planet(
+        name=data['name'],
+        description=data['description'],
+        diameter=data['diameter'],
+        orbital_period=data['orbital_period'],
+        terrain_type=data['terrain_type'],
+        atmosphere=data['atmosphere'],
+        population=data['population'],
+        climate=data['climate']
+    )
+    db.session.add(new_planet)
+    db.session.commit()
+    return jsonify(new_planet.serialize()), 201
+
+@bp.route('/planets/<int:planet_id>', methods=['PUT'])
+def update_planet(planet_id):
+    data = request.get_json()
+    planet = Planet.query.get(planet_id)
+    
+    if not planet:
+        return jsonify({"error": "Planet not found"}), 404
+    
+    planet.name = data['name']
+    planet.description = data['description']
+    planet.diameter = data['diameter']
+    planet.orbital_period = data['orbital_period']
+    planet.terrain_type = data['terrain_type']
+    planet.atmosphere = data['atmosphere']
+    planet.population = data['population']
+    planet.climate = data['climate']
+    db.session.commit()
+    entity_cache().delete('planets:%d' % planet_id)
+    
+    return jsonify(planet.serialize()), 200
+
+@bp.route('/planets/<int:planet_id>', methods=['DELETE'])
+def delete_planet(planet_id):
+    planet = Planet.query.get(planet_id)
+    
+    if not planet:
+        return jsonify({"error": "Planet not found"}), 404
+    
+    db.session.delete(planet)
+    db.session.commit()
+    entity_cache().delete('planets:%d' % planet_id)
+    return jsonify({"message": "Planet deleted successfully"}), 200
+
+@bp.route('/planets/bulk', methods=['POST'])
+def bulk_upsert_planets():
+    results = bulk_upsert(Planet, PLANET_FIELDS, read_bulk_items())
+    invalidate_bulk_results('planets', results)
+    return jsonify({"results": results}), 200
+
+@bp.route('/planets/bulk', methods=['DELETE'])
+def bulk_delete_planets():
+    results = bulk_delete(Planet, read_bulk_items())
+    invalidate_bulk_results('planets', results)
+    return jsonify({"results": results}), 200
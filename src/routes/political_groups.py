@@ -0,0 +1,55 @@
+from flask import Blueprint, request, jsonify
+from utils import paginate, requested_fields
+from models import db, serialize_columns, PoliticalGroup
+
+bp = Blueprint('political_groups', __name__)
+
+@bp.route('/political_groups', methods=['GET'])
+def get_all_political_groups():
+    fields = requested_fields(PoliticalGroup)
+    groups, next_cursor = paginate(PoliticalGroup.query.with_entities(*serialize_columns(PoliticalGroup, fields)), PoliticalGroup)
+    return jsonify({"results": [dict(group._mapping) for group in groups], "next": next_cursor}), 200
+
+@bp.route('/political_groups', methods=['POST'])
+def add_political_group():
+    data = request.get_json()
+    new_group = PoliticalGroup(
+        name=data['name'],
+        leader=data['leader'],
+        affiliation=data['affiliation'],
+        allies=data['allies'],
+        enemies=data['enemies'],
+        description=data['description']
+    )
+    db.session.add(new_group)
+    db.session.commit()
+    return jsonify(new_group.serialize()), 201
+
+@bp.route('/political_groups/<int:group_id>', methods=['PUT'])
+def update_political_group(group_id):
+    data = request.get_json()
+    group = PoliticalGroup.query.get(group_id)
+    
+    if not group:
+        return jsonify({"error": "Political group not found"}), 404
+    
+    group.name = data['name']
+    group.leader = data['leader']
+    group.affiliation = data['affiliation']
+    group.allies = data['allies']
+    group.enemies = data['enemies']
+    group.description = data['description']
+    db.session.commit()
+    
+    return jsonify(group.serialize()), 200
+
+@bp.route('/political_groups/<int:group_id>', methods=['DELETE'])
+def delete_political_group(group_id):
+    group = PoliticalGroup.query.get(group_id)
+    
+    if not group:
+        return jsonify({"error": "Political group not found"}), 404
+    
+    db.session.delete(group)
+    db.session.commit()
+    return jsonify({"message": "Political group deleted successfully"}), 200
@@ -0,0 +1,53 @@
+import time
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import text
+from utils import generate_sitemap, offset_window, reject_fields
+from search import search
+from db_pool import pool_status
+from db_routing import primary_only
+from metrics import CONTENT_TYPE
+from models import db
+from admin import admin_enabled
+
+bp = Blueprint('root', __name__)
+
+# generate sitemap with all your endpoints
+@bp.route('/')
+def sitemap():
+    return generate_sitemap(current_app, admin=admin_enabled(current_app))
+
+@bp.route('/health/db', methods=['GET'])
+@primary_only
+def health_db():
+    status = pool_status(db.engine)
+    replica_router = current_app.extensions['replica_router']
+    if replica_router.replicas:
+        status["replicas"] = {key: pool_status(db.engines[key]) for key in replica_router.replicas}
+    start = time.perf_counter()
+    try:
+        db.session.execute(text('SELECT 1'))
+    except Exception as e:
+        db.session.rollback()
+        status.update({"status": "unavailable", "error": str(e)})
+        return jsonify(status), 503
+    status.update({"status": "ok", "ping_ms": round(1000 * (time.perf_counter() - start), 3)})
+    return jsonify(status), 200
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    return current_app.extensions['metrics'].render(), 200, {"Content-Type": CONTENT_TYPE}
+
+@bp.route('/search', methods=['GET'])
+def search_all():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"error": "Missing search query 'q'"}), 400
+    # results are already just (type, id, name, rank)
+    reject_fields()
+    limit, offset = offset_window()
+
+    # fetch one extra row to know if there is a next page
+    rows = search(q, limit + 1, offset)
+    next_offset = str(offset + limit) if len(rows) > limit else None
+    results = [{"type": kind, "id": id, "name": name, "rank": rank} for kind, id, name, rank in rows[:limit]]
+    return jsonify({"results": results, "next": next_offset}), 200
@@ -0,0 +1,131 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select, exists, literal
+from utils import paginate, requested_fields, reject_fields
+from models import db, serialize_columns, insert_ignoring_duplicates, change_favorite_count, User, Planet, Character, FavoriteCharacter, FavoritePlanet
+
+bp = Blueprint('users', __name__)
+
+@bp.route('/users', methods=['GET'])
+def get_all_users():
+    users, next_cursor = paginate(User.query.with_entities(*serialize_columns(User, requested_fields(User))), User)
+    return jsonify({"results": [dict(user._mapping) for user in users], "next": next_cursor}), 200
+
+@bp.route('/users', methods=['POST'])
+def create_user():
+    try:
+        data = request.get_json()
+
+        if not data or 'first_name' not in data or 'last_name' not in data or 'email' not in data or 'password' not in data or 'is_active' not in data:
+            return jsonify({"error": "Faltan campos obligatorios"}), 400
+
+        
+        new_user = User(
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            email=data['email'],
+            password=data['password'],  # En un escenario real, deberías hash esta contraseña
+            is_active=data['is_active']
+        )
+
+        db.session.add(new_user)
+        db.session.commit()
+
+        return jsonify(new_user.serialize()), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/users/favorites', methods=['GET'])
+def get_user_favorites():
+    # the payload mixes characters and planets, compact=true is its reduced form
+    reject_fields("use compact=true for ids and names only")
+    user_id = request.args.get('user_id')
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    compact = request.args.get('compact', 'false').lower() == 'true'
+    return jsonify(user.serialize_favorites(compact=compact)), 200
+
+def add_favorite(favorite_model, entity_model, entity_column, user_id, entity_id):
+    """
+    Single INSERT ... SELECT that only inserts the pair when both the user and the entity exist,
+    and ignores it when it is already a favorite. Returns True when a row was inserted, the entity's
+    favorite_count is then incremented in the same transaction.
+    """
+    guard = select(literal(user_id), literal(entity_id)) \
+        .where(exists().where(User.id == user_id)) \
+        .where(exists().where(entity_model.id == entity_id))
+    statement = insert_ignoring_duplicates(favorite_model, ['user_id', entity_column]).from_select(['user_id', entity_column], guard)
+    added = db.session.execute(statement).rowcount > 0
+    if added:
+        change_favorite_count(entity_model, entity_id, 1)
+    return added
+
+def remove_favorite(favorite_model, entity_model, entity_column, user_id, entity_id):
+    """DELETE of the pair, returns True when there was one"""
+    deleted = favorite_model.query \
+        .filter(favorite_model.user_id == user_id, getattr(favorite_model, entity_column) == entity_id) \
+        .delete(synchronize_session=False)
+    if deleted:
+        change_favorite_count(entity_model, entity_id, -1)
+    return deleted > 0
+
+def favorite_targets_exist(entity_model, user_id, entity_id):
+    # only used when add_favorite/remove_favorite touched no row, to answer with the right 404
+    return db.session.query(exists().where(User.id == user_id), exists().where(entity_model.id == entity_id)).one()
+
+@bp.route('/favorite/planet/<int:planet_id>', methods=['POST'])
+def add_favorite_planet(planet_id):
+    user_id = request.args.get('user_id', type=int)
+    if add_favorite(FavoritePlanet, Planet, 'planet_id', user_id, planet_id):
+        db.session.commit()
+        return jsonify({"user_id": user_id, "planet_id": planet_id}), 201
+
+    user_exists, planet_exists = favorite_targets_exist(Planet, user_id, planet_id)
+    if not user_exists:
+        return jsonify({"error": "User not found"}), 404
+    if not planet_exists:
+        return jsonify({"error": "Planet not found"}), 404
+    # idempotent: adding a planet that is already a favorite is a no-op
+    return jsonify({"user_id": user_id, "planet_id": planet_id}), 200
+
+@bp.route('/favorite/people/<int:people_id>', methods=['POST'])
+def add_favorite_people(people_id):
+    user_id = request.args.get('user_id', type=int)
+    if add_favorite(FavoriteCharacter, Character, 'character_id', user_id, people_id):
+        db.session.commit()
+        return jsonify({"user_id": user_id, "character_id": people_id}), 201
+
+    user_exists, character_exists = favorite_targets_exist(Character, user_id, people_id)
+    if not user_exists:
+        return jsonify({"error": "User not found"}), 404
+    if not character_exists:
+        return jsonify({"error": "Character not found"}), 404
+    return jsonify({"user_id": user_id, "character_id": people_id}), 200
+
+@bp.route('/favorite/planet/<int:planet_id>', methods=['DELETE'])
+def remove_favorite_planet(planet_id):
+    user_id = request.args.get('user_id', type=int)
+    if remove_favorite(FavoritePlanet, Planet, 'planet_id', user_id, planet_id):
+        db.session.commit()
+        return jsonify({"message": "Favorite planet removed successfully"}), 200
+
+    user_exists, planet_exists = favorite_targets_exist(Planet, user_id, planet_id)
+    if not user_exists:
+        return jsonify({"error": "User not found"}), 404
+    if not planet_exists:
+        return jsonify({"error": "Planet not found"}), 404
+    return jsonify({"error": "Favorite planet not found"}), 404
+
+@bp.route('/favorite/people/<int:people_id>', methods=['DELETE'])
+def remove_favorite_people(people_id):
+    user_id = request.args.get('user_id', type=int)
+    if remove_favorite(FavoriteCharacter, Character, 'character_id', user_id, people_id):
+        db.session.commit()
+        return jsonify({"message": "Favorite character removed successfully"}), 200
+
+    user_exists, character_exists = favorite_targets_exist(Character, user_id, people_id)
+    if not user_exists:
+        return jsonify({"error": "User not found"}), 404
+    if not character_exists:
+        return jsonify({"error": "Character not found"}), 404
+    return jsonify({"error": "Favorite character not found"}), 404
@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import joinedload, load_only
+from utils import paginate, stream_ndjson, requested_fields
+from bulk import read_bulk_items, bulk_upsert, bulk_delete
+from models import db, Vehicle
+
+bp = Blueprint('vehicles', __name__)
+
+# fields accepted by the bulk endpoints, same ones the single item POST/PUT require
+VEHICLE_FIELDS = ['name', 'type', 'manufacturer', 'crew_capacity', 'weaponry', 'model', 'planet_id', 'character_id']
+
+def vehicle_query(fields):
+    columns = [getattr(Vehicle, field) for field in fields if field not in Vehicle.serialize_relationships]
+    options = [load_only(*columns)]
+    # planet and character are many-to-one, join them in the same SELECT instead of 2 lazy loads per vehicle
+    if 'planet' in fields:
+        options.append(joinedload(Vehicle.planet))
+    if 'character' in fields:
+        options.append(joinedload(Vehicle.character))
+    return Vehicle.query.options(*options)
+
+@bp.route('/vehicles', methods=['GET'])
+def get_all_vehicles():
+    fields = requested_fields(Vehicle)
+    vehicles, next_cursor = paginate(vehicle_query(fields), Vehicle)
+    return jsonify({"results": [vehicle.serialize(fields) for vehicle in vehicles], "next": next_cursor}), 200
+
+@bp.route('/vehicles/export', methods=['GET'])
+def export_vehicles():
+    fields = requested_fields(Vehicle)
+    return stream_ndjson(vehicle_query(fields), Vehicle, lambda vehicle: vehicle.serialize(fields))
+
+@bp.route('/vehicles', methods=['POST'])
+def add_vehicle():
+    data = request.get_json()
+    new_vehicle = Vehicle(
+        name=data['name'],
+        type=data['type'],
+        manufacturer=data['manufacturer'],
+        crew_capacity=data['crew_capacity'],
+        weaponry=data['weaponry'],
+        model=data['model'],
+        planet_id=data['planet_id'],
+        character_id=data['character_id']
+    )
+    db.session.add(new_vehicle)
+    db.session.commit()
+    return jsonify(new_vehicle.serialize()), 201
+
+@bp.route('/vehicles/<int:vehicle_id>', methods=['PUT'])
+def update_vehicle(vehicle_id):
+    data = request.get_json()
+    vehicle = Vehicle.query.get(vehicle_id)
+    
+    if not vehicle:
+        return jsonify({"error": "Vehicle not found"}), 404
+    
+    vehicle.name = data['name']
+    vehicle.type = data['type']
+    vehicle.manufacturer = data['manufacturer']
+    vehicle.crew_capacity = data['crew_capacity']
+    vehicle.weaponry = data['weaponry']
+    vehicle.model = data['model']
+    vehicle.planet_id = data['planet_id']
+    vehicle.character_id = data['character_id']
+    db.session.commit()
+    
+    return jsonify(vehicle.serialize()), 200
+
+@bp.route('/vehicles/<int:vehicle_id>', methods=['DELETE'])
+def delete_vehicle(vehicle_id):
+    vehicle = Vehicle.query.get(vehicle_id)
+    
+    if not vehicle:
+        return jsonify({"error": "Vehicle not found"}), 404
+    
+    db.session.delete(vehicle)
+    db.session.commit()
+    return jsonify({"message": "Vehicle deleted successfully"}), 200
+
+@bp.route('/vehicles/bulk', methods=['POST'])
+def bulk_upsert_vehicles():
+    results = bulk_upsert(Vehicle, VEHICLE_FIELDS, read_bulk_items())
+    return jsonify({"results": results}), 200
+
+@bp.route('/vehicles/bulk', methods=['DELETE'])
+def bulk_delete_vehicles():
+    results = bulk_delete(Vehicle, read_bulk_items())
+    return jsonify({"results": results}), 200
@@ -0,0 +1,85 @@
+"""
+Full text search across characters, planets, vehicles and political groups.
+ - SQLite: the search_index FTS5 table, kept in sync by triggers (see migration 3c1e9a7f5b20).
+   Its rowid encodes the entity: rowid = id * len(KINDS) + position of the kind in KINDS.
+   Databases built with db.create_all() instead of the migrations have no search_index and use LIKE.
+ - PostgreSQL: GIN indexes on the SEARCH_VECTORS expressions, which postgres keeps in sync by itself.
+ - Any other database: unranked LIKE on the same columns.
+"""
+import weakref
+from sqlalchemy import text
+from models import db
+
+KINDS = ('people', 'planets', 'vehicles', 'political_groups')
+TABLES = {'people': 'characters', 'planets': 'planets', 'vehicles': 'vehicles', 'political_groups': 'political_groups'}
+# the second column of each entity that is searched besides the name
+BODY_COLUMNS = {'people': 'description', 'planets': 'description', 'vehicles': 'weaponry', 'political_groups': 'description'}
+
+# must stay identical to the indexed expressions, otherwise postgres won't use the GIN indexes
+SEARCH_VECTORS = {
+    kind: "setweight(to_tsvector('english', coalesce(name, '')), 'A') || setweight(to_tsvector('english', coalesce(%s, '')), 'B')" % column
+    for kind, column in BODY_COLUMNS.items()
+}
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keeps alembic autogenerate from dropping the FTS5 table and its shadow tables, which have no model"""
+    return not (type_ == 'table' and reflected and compare_to is None and name.startswith('search_index'))
+
+# engines whose database has the search_index table, only the migrations create it
+_fts5_engines = weakref.WeakSet()
+
+def _has_search_index():
+    engine = db.session.get_bind()
+    if engine not in _fts5_engines:
+        # a missing table isn't remembered, `flask db upgrade` may create it while the app runs
+        if db.session.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")).first() is None:
+            return False
+        _fts5_engines.add(engine)
+    return True
+
+def _fts5_query(q):
+    # every word is quoted so FTS5 operators typed by the user are matched as plain text
+    return " ".join('"%s"' % word.replace('"', '""') for word in q.split())
+
+def _search_sqlite(q, limit, offset):
+    rows = db.session.execute(text(
+        "SELECT rowid, name, bm25(search_index, 10.0, 1.0) AS rank FROM search_index "
+        "WHERE search_index MATCH :q ORDER BY rank LIMIT :limit OFFSET :offset"
+    ), {"q": _fts5_query(q), "limit": limit, "offset": offset})
+    # bm25 is lower for better matches, flip it so a higher rank is always better
+    return [(KINDS[rowid % len(KINDS)], rowid // len(KINDS), name, -rank) for rowid, name, rank in rows]
+
+def _search_postgresql(q, limit, offset):
+    selects = [
+        "SELECT '%s' AS kind, id, name, ts_rank(%s, query) AS rank FROM %s, plainto_tsquery('english', :q) query WHERE %s @@ query"
+        % (kind, SEARCH_VECTORS[kind], TABLES[kind], SEARCH_VECTORS[kind])
+        for kind in KINDS
+    ]
+    rows = db.session.execute(text(
+        " UNION ALL ".join(selects) + " ORDER BY rank DESC, kind, id LIMIT :limit OFFSET :offset"
+    ), {"q": q, "limit": limit, "offset": offset})
+    return [tuple(row) for row in rows]
+
+def _like_escape(q):
+    # the query is matched literally: % and _ are not wildcards. '!' rather than a backslash, which mysql reads as a string escape
+    return q.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def _search_like(q, limit, offset):
+    selects = [
+        "SELECT '%s' AS kind, id, name, 0 AS rank FROM %s WHERE name LIKE :pattern ESCAPE '!' OR %s LIKE :pattern ESCAPE '!'"
+        % (kind, TABLES[kind], BODY_COLUMNS[kind])
+        for kind in KINDS
+    ]
+    rows = db.session.execute(text(
+        " UNION ALL ".join(selects) + " ORDER BY kind, id LIMIT :limit OFFSET :offset"
+    ), {"pattern": "%" + _like_escape(q) + "%", "limit": limit, "offset": offset})
+    return [tuple(row) for row in rows]
+
+def search(q, limit, offset):
+    """Ranked matches for q, best first, as (kind, id, name, rank) tuples"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite' and _has_search_index():
+        return _search_sqlite(q, limit, offset)
+    if dialect == 'postgresql':
+        return _search_postgresql(q, limit, offset)
+    return _search_like(q, limit, offset)
@@ -1,4 +1,15 @@
-from flask import jsonify, url_for
+import os
+import json
+import base64
+import binascii
+from datetime import datetime, timezone
+from sqlalchemy import or_
+from flask import jsonify, url_for, request, make_response, current_app, Response, stream_with_context
+from werkzeug.http import parse_etags, parse_date
+
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 50))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 500))
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
 
 class APIException(Exception):
     status_code = 400
@@ -15,13 +26,247 @@ class APIException(Exception):
         rv['message'] = self.message
         return rv
 
+def _int_arg(name, value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise APIException("'%s' must be an integer" % name, status_code=400)
+
+# the query param helpers read flask's request.args by default, the async handlers pass their own query params
+
+def requested_fields(model, args=None):
+    """
+    Fields asked for with ?fields=a,b, in model.serialize_fields order (all of them when the param is missing).
+    The id is always included since pagination cursors are built from it. Unknown names are a 400.
+    """
+    fields = (request.args if args is None else args).get('fields')
+    if not fields:
+        return model.serialize_fields
+
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in model.serialize_fields]
+    if unknown:
+        raise APIException("Unknown fields: " + ", ".join(unknown), status_code=400)
+    return tuple(field for field in model.serialize_fields if field == 'id' or field in names)
+
+def reject_fields(hint=None, args=None):
+    """?fields= on a route whose payload has no sparse fieldsets is a 400, rather than silently ignored"""
+    if 'fields' in (request.args if args is None else args):
+        message = "'fields' is not supported on this endpoint"
+        raise APIException(message + ", " + hint if hint else message, status_code=400)
+
+def requested_includes(model, args=None):
+    """Relationships asked for with ?include=a,b, in model.include_relationships order. Unknown names are a 400."""
+    include = (request.args if args is None else args).get('include')
+    if not include:
+        return ()
+
+    names = [name.strip() for name in include.split(',') if name.strip()]
+    allowed = getattr(model, 'include_relationships', ())
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise APIException("Can't include: %s, use some of: %s" % (", ".join(unknown), ", ".join(allowed)), status_code=400)
+    return tuple(name for name in allowed if name in names)
+
+def apply_filters(query, model, args=None):
+    """Equality filters for the whitelisted model.filter_fields, ?species=Human&species=Droid matches any of them"""
+    args = request.args if args is None else args
+    for field in model.filter_fields:
+        values = args.getlist(field)
+        if len(values) == 1:
+            query = query.filter(getattr(model, field) == values[0])
+        elif values:
+            query = query.filter(getattr(model, field).in_(values))
+    return query
+
+def requested_sort(model, args=None):
+    """?sort=name or ?sort=-name (descending), only for the whitelisted model.sort_fields"""
+    sort = (request.args if args is None else args).get('sort')
+    if not sort:
+        return None
+    descending = sort.startswith('-')
+    field = sort.lstrip('-')
+    if field not in model.sort_fields:
+        raise APIException("Can't sort by '%s', use one of: %s" % (field, ", ".join(model.sort_fields)), status_code=400)
+    return getattr(model, field), descending
+
+def with_sort_field(fields, sort):
+    """The fields plus the sort column, the cursor of the next page is built from its value in the last row"""
+    if sort is None or sort[0].key in fields:
+        return fields
+    return tuple(fields) + (sort[0].key,)
+
+def _encode_cursor(value, entity_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, entity_id]).encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor, column):
+    """(sort value, id) of an ?after= cursor of a sorted page, anything that isn't one of ours is a 400"""
+    try:
+        value, entity_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        python_type = column.type.python_type
+        if python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, python_type) or isinstance(value, bool):
+            raise ValueError(value)
+        if not isinstance(entity_id, int) or isinstance(entity_id, bool):
+            raise ValueError(entity_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise APIException("'after' is not a valid cursor", status_code=400)
+    return value, entity_id
+
+def paginate(query, model, sort=None):
+    """
+    Keyset pagination: ?limit=N&after=<cursor>, where the cursor comes from the last row of the previous page.
+    Rows are ordered by the primary key, or by (sort column, primary key) when a sort from requested_sort() is given.
+    The cursor is the id of that row, or an opaque encoding of its (sort value, id) on a sorted page:
+    it doesn't depend on the row still existing or still having the same sort value.
+    The query must select the sort column, see with_sort_field().
+    The page size is capped at MAX_PAGE_SIZE, ?limit=all returns the whole table.
+    Returns the rows of the page and the cursor of the next one (None on the last page).
+    """
+    query, limit = page_query(query, model, sort)
+    return page_result(query.all(), limit, sort)
+
+def page_query(query, model, sort=None, args=None):
+    """
+    The query (or select() statement) of the page asked for, and its page size (None for ?limit=all).
+    paginate() runs it, code that executes statements itself passes the rows to page_result().
+    """
+    args = request.args if args is None else args
+    column, descending = sort or (model.id, False)
+    if column is model.id:
+        order_by = [model.id.desc() if descending else model.id]
+    else:
+        order_by = [column.desc(), model.id.desc()] if descending else [column, model.id]
+    query = query.order_by(*order_by)
+
+    limit = args.get('limit', DEFAULT_PAGE_SIZE)
+    if limit == 'all':
+        return query, None
+
+    limit = _int_arg('limit', limit)
+    if limit < 1:
+        raise APIException("'limit' must be greater than 0", status_code=400)
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    after = args.get('after')
+    if after is not None:
+        if column is model.id:
+            after = _int_arg('after', after)
+            query = query.filter(model.id < after if descending else model.id > after)
+        else:
+            value, after = _decode_cursor(after, column)
+            # the bound on the column alone lets the (column, id) index seek to the cursor instead of scanning up to it
+            if descending:
+                query = query.filter(column <= value, or_(column < value, model.id < after))
+            else:
+                query = query.filter(column >= value, or_(column > value, model.id > after))
+
+    # fetch one extra row to know if there is a next page without a COUNT(*)
+    return query.limit(limit + 1), limit
+
+def page_result(rows, limit, sort=None):
+    """Rows of the page and the cursor of the next one, from the rows of a page_query() with the same sort"""
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if sort is None or sort[0].key == 'id':
+            return rows, str(last.id)
+        return rows, _encode_cursor(getattr(last, sort[0].key), last.id)
+    return rows, None
+
+def offset_window():
+    """
+    ?limit=N&offset=M for results without a stable key to paginate on, like ranked search results.
+    The limit is capped at MAX_PAGE_SIZE.
+    """
+    limit = _int_arg('limit', request.args.get('limit', DEFAULT_PAGE_SIZE))
+    offset = _int_arg('offset', request.args.get('offset', 0))
+    if limit < 1:
+        raise APIException("'limit' must be greater than 0", status_code=400)
+    if offset < 0:
+        raise APIException("'offset' can't be negative", status_code=400)
+    return min(limit, MAX_PAGE_SIZE), offset
+
+def http_last_modified(last_modified):
+    # stored as naive utc, and HTTP dates have a 1 second resolution
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) if last_modified is not None else None
+
+# the encodings compression.py can send, each one is a representation of its own with its own ETag
+CONTENT_CODINGS = ('zstd', 'br', 'gzip')
+
+def coded_etag(etag, encoding):
+    """ETag of the representation compressed with encoding ("<etag>-gzip"), the etag itself when sent as is"""
+    return '%s-%s' % (etag, encoding) if encoding else etag
+
+def matched_etag(headers, etag):
+    """The If-None-Match tag naming etag, in any of its encodings (see coded_etag), None when none does"""
+    etags = parse_etags(headers.get('If-None-Match'))
+    if etags.star_tag:
+        return etag
+    for tag in etags.as_set(include_weak=True):
+        if tag == etag or tag in [coded_etag(etag, encoding) for encoding in CONTENT_CODINGS]:
+            return tag
+    return None
+
+def is_not_modified(headers, etag, last_modified):
+    """True when the If-None-Match (or else If-Modified-Since) request header still matches"""
+    if headers.get('If-None-Match'):
+        return matched_etag(headers, etag) is not None
+    if_modified_since = parse_date(headers.get('If-Modified-Since'))
+    return last_modified is not None and if_modified_since is not None and last_modified <= if_modified_since
+
+def conditional_response(etag, last_modified, build):
+    """
+    Answer 304 Not Modified when the If-None-Match/If-Modified-Since headers still match,
+    otherwise call build() to produce the response, unless a compressed copy of it is cached.
+    All cases carry the ETag and Last-Modified headers.
+    """
+    last_modified = http_last_modified(last_modified)
+    if is_not_modified(request.headers, etag, last_modified):
+        response = make_response(('', 304))
+        # the tag the client holds: the 200 it stands for may have been compressed
+        response.set_etag(matched_etag(request.headers, etag) or etag)
+    else:
+        # an already compressed copy of this representation (see compression.py) doesn't need build() at all
+        compressor = current_app.extensions.get('compressor')
+        cached = compressor.cached_response(etag, current_app.response_class) if compressor else None
+        response = cached or make_response(build())
+        response.set_etag(coded_etag(etag, response.headers.get('Content-Encoding')))
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+def stream_ndjson(query, model, serialize):
+    """
+    Stream every row of the query as NDJSON (one serialized object per line).
+    Rows come from a server side cursor EXPORT_CHUNK_SIZE at a time and each chunk is
+    sent as soon as it is encoded, so memory stays flat whatever the table size.
+    """
+    query = query.order_by(model.id).execution_options(stream_results=True).yield_per(EXPORT_CHUNK_SIZE)
+    dumps = current_app.json.dumps
+
+    def generate():
+        lines = []
+        for row in query:
+            lines.append(dumps(serialize(row)))
+            if len(lines) >= EXPORT_CHUNK_SIZE:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()
     return len(defaults) >= len(arguments)
 
-def generate_sitemap(app):
-    links = ['/admin/']
+def generate_sitemap(app, admin=True):
+    links = ['/admin/'] if admin else []
     for rule in app.url_map.iter_rules():
         # Filter out rules we can't navigate to in a browser
         # and rules that require parameters
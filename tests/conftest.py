@@ -0,0 +1,84 @@
+"""
+Every test gets its own app from create_app(), on its own in-memory SQLite database built with db.create_all(),
+so tests don't share any state and run in parallel with `pytest -n auto` (pytest-xdist).
+"""
+import pytest
+from sqlalchemy import event
+from factory import create_app
+from models import db, Character, Planet, Vehicle, PoliticalGroup, User
+
+TEST_CONFIG = {
+    "SQLALCHEMY_DATABASE_URI": "sqlite://",
+    "ENABLE_ADMIN": "false",
+    "TESTING": True,
+}
+
+def make_app(config=None):
+    app = create_app(dict(TEST_CONFIG, **(config or {})))
+    with app.app_context():
+        # the models are all on the default bind, replica binds registered by other apps have no tables
+        db.create_all(bind_key=None)
+    return app
+
+@pytest.fixture
+def app():
+    app = make_app()
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def statements(app):
+    """SQL statements run on the app's database during the test, as (statement, parameters)"""
+    recorded = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    yield recorded
+    event.remove(engine, 'before_cursor_execute', record)
+
+def character(number, **fields):
+    values = {"name": "Character %d" % number, "description": "description %d" % number, "species": "Human",
+              "homeworld": "Tatooine", "special_ability": "none", "affiliation": "Rebel Alliance", "favorite_weapon": "blaster",
+              "eye_color": "blue", "hair_color": "brown", "birth_year": "19BBY", "gender": "male"}
+    values.update(fields)
+    return Character(**values)
+
+def planet(number, **fields):
+    values = {"name": "Planet %d" % number, "description": "description %d" % number, "diameter": 10465.0, "orbital_period": 304,
+              "terrain_type": "desert", "atmosphere": "breathable", "population": 200000, "climate": "arid"}
+    values.update(fields)
+    return Planet(**values)
+
+def vehicle(number, **fields):
+    values = {"name": "Vehicle %d" % number, "type": "speeder", "manufacturer": "Incom", "crew_capacity": 1,
+              "weaponry": "laser cannons", "model": "T-%d" % number}
+    values.update(fields)
+    return Vehicle(**values)
+
+def political_group(number, **fields):
+    values = {"name": "Group %d" % number, "leader": "Leader %d" % number, "affiliation": "Rebel Alliance",
+              "allies": "", "enemies": "", "description": "description %d" % number}
+    values.update(fields)
+    return PoliticalGroup(**values)
+
+def user(number, **fields):
+    values = {"first_name": "First", "last_name": "Last", "email": "user%d@example.com" % number, "password": "secret", "is_active": True}
+    values.update(fields)
+    return User(**values)
+
+def add(app, *entities):
+    """Insert the entities and return their ids"""
+    with app.app_context():
+        db.session.add_all(entities)
+        db.session.commit()
+        return [entity.id for entity in entities]
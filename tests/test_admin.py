@@ -0,0 +1,31 @@
+import pytest
+from models import db
+from conftest import make_app, character, add
+
+def test_lazy_admin_uses_the_app_database():
+    # sqlite:// is a different database for every engine, the admin only sees the rows through the app's own engine
+    app = make_app({"ENABLE_ADMIN": "lazy"})
+    add(app, character(1, name='Visible in the admin'))
+    client = app.test_client()
+
+    response = client.get('/admin/character/')
+    assert response.status_code == 200
+    assert b'Visible in the admin' in response.data
+    assert client.get('/people/1').status_code == 200
+    with app.app_context():
+        engine = db.engine
+    with app.wsgi_app.admin_app.app_context():
+        assert db.engine is engine
+
+def test_admin_is_built_on_first_use():
+    app = make_app({"ENABLE_ADMIN": "lazy"})
+
+    assert app.wsgi_app.admin_app is None
+    assert app.test_client().get('/admin/').status_code == 200
+    assert app.wsgi_app.admin_app is not None
+
+@pytest.mark.parametrize('mode, listed', [('lazy', True), ('true', True), ('false', False)])
+def test_sitemap_lists_the_admin_when_enabled(mode, listed):
+    page = make_app({"ENABLE_ADMIN": mode}).test_client().get('/').get_data(as_text=True)
+
+    assert ("href='/admin/'" in page) == listed
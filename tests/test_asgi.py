@@ -0,0 +1,177 @@
+"""
+The async handlers of asgi.py driven with raw ASGI messages, every answer compared with the flask route's.
+asgi.py builds its app and async engine at import, from DATABASE_URL: one database for the whole module.
+"""
+import sys
+import json
+import gzip
+import asyncio
+import threading
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from conftest import character, planet, political_group, vehicle, add
+
+pytest.importorskip('starlette')
+pytest.importorskip('a2wsgi')
+pytest.importorskip('aiosqlite')
+
+@pytest.fixture(scope='module')
+def asgi(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('DATABASE_URL', 'sqlite:///%s' % (tmp_path_factory.mktemp('asgi') / 'asgi.db'))
+        monkeypatch.setenv('ENABLE_ADMIN', 'false')
+        for name in ('app', 'asgi'):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+        import asgi
+    from models import db
+    with asgi.app.app_context():
+        db.create_all(bind_key=None)
+    group_id, = add(asgi.app, political_group(1))
+    add(asgi.app, *[character(number, political_group_id=group_id, species='Droid' if number % 3 else 'Human') for number in range(40)])
+    add(asgi.app, *[planet(number) for number in range(5)])
+    add(asgi.app, vehicle(1, character_id=1, planet_id=1))
+
+    loop = asyncio.new_event_loop()
+    asgi.loop = loop
+    yield asgi
+    loop.run_until_complete(asgi.engine.dispose())
+    loop.close()
+
+def call(asgi, url, headers=None):
+    """GET url on asgi.application, returns (status, headers, body)"""
+    path, _, query = url.partition('?')
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "server": ("testserver", 80), "client": ("127.0.0.1", 50000),
+    }
+    messages = []
+    done = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    asgi.loop.run_until_complete(asgi.application(scope, receive, send))
+    start = messages[0]
+    response_headers = {name.decode().lower(): value.decode() for name, value in start["headers"]}
+    return start["status"], response_headers, b"".join(message.get("body", b"") for message in messages[1:])
+
+def both(asgi, url, headers=None):
+    """The (status, headers, body) of the async handler and of the flask route, body decoded"""
+    status, async_headers, body = call(asgi, url, headers)
+    response = asgi.app.test_client().get(url, headers=headers or {})
+    flask_headers = {name.lower(): value for name, value in response.headers.items()}
+
+    def decode(headers, data):
+        if headers.get('content-encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return json.loads(data) if data else None
+    return (status, async_headers, decode(async_headers, body)), (response.status_code, flask_headers, decode(flask_headers, response.data))
+
+@pytest.mark.parametrize('url', [
+    '/people', '/people?limit=5', '/people?fields=id,name&species=Human', '/people?sort=-name&limit=3&fields=id',
+    '/planets?limit=all', '/people/3', '/people/3?fields=name', '/planets/2', '/people/999', '/people?sort=height',
+])
+def test_same_answer_as_flask(asgi, url):
+    (status, headers, body), (flask_status, flask_headers, flask_body) = both(asgi, url)
+
+    assert status == flask_status
+    assert body == flask_body
+    for name in ('etag', 'last-modified', 'content-encoding', 'vary'):
+        assert headers.get(name) == flask_headers.get(name), name
+
+def test_same_pagination_cursors(asgi):
+    url = '/people?sort=name&limit=7'
+    pages = 0
+    while True:
+        (_, _, body), (_, _, flask_body) = both(asgi, url)
+        assert body == flask_body
+        pages += 1
+        if body['next'] is None:
+            break
+        url = '/people?sort=name&limit=7&after=' + body['next']
+    assert pages == 6
+
+@pytest.mark.parametrize('url', ['/people', '/people/4', '/people?limit=all'])
+@pytest.mark.parametrize('accept', [{}, {'Accept-Encoding': 'gzip'}])
+def test_not_modified(asgi, url, accept):
+    etag = call(asgi, url, accept)[1]['etag']
+    status, headers, body = call(asgi, url, dict(accept, **{'If-None-Match': etag}))
+
+    assert status == 304 and body == b''
+    assert headers['etag'] == etag
+    response = asgi.app.test_client().get(url, headers=dict(accept, **{'If-None-Match': etag}))
+    assert response.status_code == 304 and response.headers['ETag'] == etag
+
+def test_compressed_like_flask(asgi):
+    (status, headers, body), (_, flask_headers, flask_body) = both(asgi, '/people?limit=all', {'Accept-Encoding': 'gzip'})
+
+    assert status == 200 and headers['content-encoding'] == 'gzip'
+    assert headers['etag'] == flask_headers['etag'] and headers['etag'].endswith('-gzip"')
+    assert body == flask_body
+
+def test_include_is_answered_by_flask(asgi):
+    (status, _, body), (_, _, flask_body) = both(asgi, '/people?include=political_group,vehicles&limit=2')
+
+    assert status == 200
+    assert body == flask_body
+    assert body['results'][0]['political_group']['name'] == 'Group 1'
+    assert [vehicle['name'] for vehicle in body['results'][0]['vehicles']] == ['Vehicle 1']
+
+def test_other_routes_are_answered_by_flask(asgi):
+    status, _, body = call(asgi, '/vehicles')
+
+    assert status == 200
+    assert [vehicle['name'] for vehicle in json.loads(body)['results']] == ['Vehicle 1']
+
+def test_served_by_the_async_handlers(asgi, monkeypatch):
+    served = []
+    for name in ('list_collection', 'get_entity'):
+        handler = getattr(asgi, name)
+        monkeypatch.setattr(asgi, name, lambda *args, handler=handler, name=name: served.append(name) or handler(*args))
+
+    assert call(asgi, '/people?limit=1')[0] == 200
+    assert call(asgi, '/planets/1')[0] == 200
+    assert served == ['list_collection', 'get_entity']
+
+def test_pool_timeout_is_a_503(asgi, monkeypatch):
+    class BusyEngine:
+        def connect(self):
+            raise PoolTimeoutError("QueuePool limit reached")
+    monkeypatch.setattr(asgi, 'engine', BusyEngine())
+    status, headers, body = call(asgi, '/planets?limit=1')
+
+    assert status == 503 and headers['retry-after'] == '1'
+    assert json.loads(body) == {"error": "Database is busy, try again later"}
+
+def test_network_cache_runs_in_the_threadpool(asgi, monkeypatch):
+    class RemoteCache:
+        """Stand-in for redis, records the thread of every call"""
+        def __init__(self):
+            self.threads = []
+
+        def get(self, key):
+            self.threads.append(threading.current_thread())
+
+        def set(self, key, value):
+            self.threads.append(threading.current_thread())
+
+        def delete(self, key):
+            self.threads.append(threading.current_thread())
+    cache = RemoteCache()
+    monkeypatch.setattr(asgi, 'entity_cache', cache)
+
+    assert call(asgi, '/planets/3')[0] == 200
+    assert len(cache.threads) == 2 and threading.main_thread() not in cache.threads
@@ -0,0 +1,54 @@
+import pytest
+import bulk
+from models import db, Character
+from conftest import character, add
+
+FIELDS = ('name', 'description', 'species', 'homeworld', 'special_ability', 'affiliation', 'favorite_weapon', 'eye_color', 'hair_color', 'birth_year', 'gender')
+
+def item(number, **fields):
+    values = {field: getattr(character(number), field) for field in FIELDS}
+    values.update(fields)
+    return values
+
+def inserts(statements):
+    return [statement for statement, _ in statements if statement.startswith('INSERT INTO characters')]
+
+def test_insert_is_one_statement_per_chunk(app, client, statements, monkeypatch):
+    monkeypatch.setattr(bulk, 'BULK_CHUNK_SIZE', 500)
+    response = client.post('/people/bulk', json=[item(number) for number in range(1200)])
+
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [201] * 1200
+    assert len(inserts(statements)) == 3
+    with app.app_context():
+        names = dict(db.session.query(Character.id, Character.name))
+        created_at = db.session.query(Character.created_at).filter(Character.created_at.is_(None)).count()
+    assert [names[result['id']] for result in results] == ["Character %d" % number for number in range(1200)]
+    assert created_at == 0
+
+def test_ids_follow_existing_and_deleted_rows(app, client):
+    add(app, character(1), character(2), character(3))
+    client.delete('/people/3')
+
+    results = client.post('/people/bulk', json=[item(10), item(11)]).get_json()['results']
+    assert [client.get('/people/%d' % result['id']).get_json()['name'] for result in results] == ['Character 10', 'Character 11']
+
+def test_invalid_items_do_not_stop_the_others(client):
+    results = client.post('/people/bulk', json=[item(1), {"name": "incomplete"}, item(2)]).get_json()['results']
+
+    assert [result['status'] for result in results] == [201, 400, 201]
+
+@pytest.mark.parametrize('entity_id', [True, False, "1", 1.0])
+def test_update_rejects_ids_that_are_not_integers(app, client, entity_id):
+    add(app, character(1))
+    result = client.post('/people/bulk', json=[item(1, id=entity_id, name='Changed')]).get_json()['results'][0]
+
+    assert result['status'] == 400
+    assert client.get('/people/1').get_json()['name'] == 'Character 1'
+
+def test_delete_rejects_booleans(app, client):
+    add(app, character(1))
+    results = client.delete('/people/bulk', json=[True, 1]).get_json()['results']
+
+    assert [result['status'] for result in results] == [400, 200]
+    assert results[1]['id'] == 1
@@ -0,0 +1,70 @@
+import gzip
+import pytest
+from werkzeug.http import unquote_etag
+from cache import LRUCache
+from conftest import make_app, character, add
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+@pytest.fixture
+def people(app):
+    add(app, *[character(number) for number in range(20)])
+
+@pytest.mark.parametrize('url, compressed', [('/people?limit=all', True), ('/people/1', False)])
+def test_strong_etag_per_encoding(client, people, url, compressed):
+    # the collection is compressed, the single entity is too small to be
+    plain = client.get(url).headers['ETag']
+    first = client.get(url, headers=GZIP)
+    assert not plain.startswith('W/') and not first.headers['ETag'].startswith('W/')
+    assert first.headers['ETag'] == (plain[:-1] + '-gzip"' if compressed else plain)
+
+    again = client.get(url, headers=dict(GZIP, **{'If-None-Match': first.headers['ETag']}))
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+
+def test_any_encoding_of_the_etag_matches(client, people):
+    plain = client.get('/people?limit=all').headers['ETag']
+
+    for tag in (plain, plain[:-1] + '-gzip"', plain[:-1] + '-br"', 'W/' + plain):
+        response = client.get('/people?limit=all', headers=dict(GZIP, **{'If-None-Match': tag}))
+        assert response.status_code == 304 and response.headers['ETag'] == tag.lstrip('W/')
+    assert client.get('/people?limit=all', headers={'If-None-Match': plain[:-1] + '-deflate"'}).status_code == 200
+
+def test_etag_is_strong_without_an_accepted_encoding(client, people):
+    first = client.get('/people?limit=all')
+    assert 'Content-Encoding' not in first.headers and not first.headers['ETag'].startswith('W/')
+
+    again = client.get('/people?limit=all', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+
+def test_cached_compressed_body(client, people):
+    first = client.get('/people?limit=all', headers=GZIP)
+    second = client.get('/people?limit=all', headers=GZIP)
+
+    assert first.headers['Content-Encoding'] == second.headers['Content-Encoding'] == 'gzip'
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert gzip.decompress(second.data) == gzip.decompress(first.data)
+    assert b'Character 19' in gzip.decompress(second.data)
+
+def test_unknown_params_share_the_etag(client, people):
+    etag = client.get('/people?limit=5&species=Human').headers['ETag']
+
+    assert client.get('/people?species=Human&limit=5&_=1700000000').headers['ETag'] == etag
+    assert client.get('/people?limit=6&species=Human').headers['ETag'] != etag
+
+def test_cache_is_capped_by_bytes():
+    cache = LRUCache(max_entries=None, max_bytes=10)
+    cache.set('a', b'12345')
+    cache.set('b', b'123456')
+    cache.set('c', b'12345678901')
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (None, b'123456', None)
+
+def test_large_bodies_are_not_cached():
+    app = make_app({"COMPRESS_CACHE_MAX_BODY": 100})
+    add(app, *[character(number) for number in range(20)])
+    response = app.test_client().get('/people?limit=all', headers=GZIP)
+
+    assert response.headers['Content-Encoding'] == 'gzip' and len(response.data) > 100
+    assert app.extensions['compressor'].cached(unquote_etag(response.headers['ETag'])[0][:-len('-gzip')], 'gzip') is None
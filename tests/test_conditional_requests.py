@@ -0,0 +1,33 @@
+from conftest import character, add
+
+def test_collection_has_no_last_modified(app, client):
+    add(app, character(1))
+    response = client.get('/people')
+
+    assert response.headers.get('ETag')
+    assert 'Last-Modified' not in response.headers
+
+def test_deleted_row_is_not_hidden_by_if_modified_since(app, client):
+    add(app, character(1), character(2))
+    first = client.get('/people?limit=all')
+    assert client.delete('/people/1').status_code == 200
+
+    response = client.get('/people?limit=all', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
+    assert [person['id'] for person in response.get_json()['results']] == [2]
+
+    response = client.get('/people?limit=all', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+
+def test_unchanged_collection_is_304(app, client):
+    add(app, character(1))
+    etag = client.get('/people').headers['ETag']
+
+    assert client.get('/people', headers={'If-None-Match': etag}).status_code == 304
+
+def test_entity_keeps_last_modified(app, client):
+    add(app, character(1))
+    response = client.get('/people/1')
+
+    assert response.headers.get('Last-Modified')
+    assert client.get('/people/1', headers={'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import event
+from cache import LRUCache, RedisCache, NullCache, checks_hits
+from models import db, Character, Planet
+from conftest import make_app, character, planet, add
+
+def two_workers(tmp_path, **config):
+    """Two apps on the same database file, like two gunicorn workers each with its own in-memory cache"""
+    config = dict(config, SQLALCHEMY_DATABASE_URI="sqlite:///%s" % (tmp_path / 'shared.db'))
+    return make_app(config), make_app(config)
+
+@pytest.fixture
+def workers(tmp_path):
+    return two_workers(tmp_path)
+
+def character_fields(**fields):
+    values = {field: getattr(character(0), field) for field in ('name', 'description', 'species', 'homeworld', 'special_ability', 'affiliation',
+                                                                'favorite_weapon', 'eye_color', 'hair_color', 'birth_year', 'gender')}
+    values.update(fields)
+    return values
+
+def test_write_on_another_worker_is_seen(workers):
+    first, second = workers
+    add(first, character(1))
+    reader, writer = second.test_client(), first.test_client()
+    assert reader.get('/people/1').get_json()['name'] == 'Character 1'
+
+    assert writer.put('/people/1', json=character_fields(name='Renamed')).status_code == 200
+    for _ in range(5):
+        assert reader.get('/people/1').get_json()['name'] == 'Renamed'
+
+def test_delete_on_another_worker_is_seen(workers):
+    first, second = workers
+    add(first, planet(1))
+    reader = second.test_client()
+    assert reader.get('/planets/1').status_code == 200
+
+    assert first.test_client().delete('/planets/1').status_code == 200
+    assert reader.get('/planets/1').status_code == 404
+
+def test_edit_outside_the_routes_is_seen(app, client):
+    # the admin edits through the ORM and never touches the cache
+    add(app, character(1))
+    etag = client.get('/people/1').headers['ETag']
+    with app.app_context():
+        db.session.get(Character, 1).name = 'Edited'
+        db.session.commit()
+
+    response = client.get('/people/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'Edited'
+
+def test_bulk_update_is_seen(workers):
+    first, second = workers
+    add(first, planet(1))
+    reader = second.test_client()
+    assert reader.get('/planets/1').get_json()['climate'] == 'arid'
+
+    item = {field: getattr(planet(1), field) for field in ('name', 'description', 'diameter', 'orbital_period', 'terrain_type', 'atmosphere', 'population')}
+    assert first.test_client().post('/planets/bulk', json=[dict(item, id=1, climate='frozen')]).status_code == 200
+    assert reader.get('/planets/1').get_json()['climate'] == 'frozen'
+
+def test_hit_is_one_timestamp_lookup(app, client, statements):
+    add(app, planet(1))
+    client.get('/planets/1')
+    statements.clear()
+
+    client.get('/planets/1')
+    assert len(statements) == 1
+    assert 'planets.created_at' in statements[0][0] and 'planets.name' not in statements[0][0]
+    with app.app_context():
+        assert db.session.get(Planet, 1) is not None
+
+def test_only_the_memory_cache_is_checked_by_default():
+    # RedisCache without __init__, no server needed to tell its type
+    redis_cache = RedisCache.__new__(RedisCache)
+
+    assert checks_hits(LRUCache(), 'auto') and not checks_hits(redis_cache, 'auto') and not checks_hits(NullCache(), 'auto')
+    assert checks_hits(redis_cache, 'true') and not checks_hits(LRUCache(), 'false')
+
+def test_unchecked_hit_runs_no_statement(tmp_path):
+    first, second = two_workers(tmp_path, CACHE_CHECK_HITS='false')
+    add(first, planet(1))
+    client = first.test_client()
+    client.get('/planets/1')
+
+    statements = []
+    with first.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    assert client.get('/planets/1').status_code == 200
+    assert statements == []
+
+    # the writer's own cache is evicted, the other worker's copy lives until CACHE_TTL
+    second_client = second.test_client()
+    second_client.get('/planets/1')
+    item = {field: getattr(planet(1), field) for field in ('name', 'description', 'diameter', 'orbital_period', 'terrain_type', 'atmosphere', 'population')}
+    assert client.put('/planets/1', json=dict(item, climate='frozen')).status_code == 200
+    assert client.get('/planets/1').get_json()['climate'] == 'frozen'
+    assert second_client.get('/planets/1').get_json()['climate'] == 'arid'
@@ -0,0 +1,27 @@
+from models import db, Character
+from conftest import make_app, character, add
+
+def test_apps_do_not_share_state():
+    first, second = make_app(), make_app()
+    add(first, character(1))
+
+    assert first.test_client().get('/people/1').status_code == 200
+    assert second.test_client().get('/people/1').status_code == 404
+    assert first.extensions['entity_cache'] is not second.extensions['entity_cache']
+    with first.app_context():
+        first_engine = db.engine
+    with second.app_context():
+        assert db.engine is not first_engine
+
+def test_hundreds_of_apps():
+    apps = [make_app() for _ in range(200)]
+    for number, app in enumerate(apps):
+        add(app, character(number))
+    for number, app in enumerate(apps):
+        with app.app_context():
+            assert [name for name, in db.session.query(Character.name)] == ["Character %d" % number]
+
+def test_config_overrides_the_environment(monkeypatch):
+    monkeypatch.setenv('SLOW_REQUEST_MS', '1')
+    assert make_app({"SLOW_REQUEST_MS": 250.0}).config['SLOW_REQUEST_MS'] == 250.0
+    assert make_app().config['SLOW_REQUEST_MS'] == 1.0
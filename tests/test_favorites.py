@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import func, select, update
+from commands import reconcile_favorites_command
+from models import db, Character, Planet, FavoriteCharacter, FavoritePlanet
+from routes import users
+from conftest import character, planet, user, add
+
+@pytest.fixture
+def ids(app):
+    """(user id, character id, planet id)"""
+    return add(app, user(1), character(1), planet(1))
+
+def favorite_rows(app, model):
+    with app.app_context():
+        return db.session.execute(select(func.count(model.id))).scalar()
+
+@pytest.mark.parametrize('kind, model', [('people', FavoriteCharacter), ('planet', FavoritePlanet)])
+def test_repeated_add_is_idempotent(app, client, ids, kind, model):
+    user_id, character_id, planet_id = ids
+    url = '/favorite/%s/%d?user_id=%d' % (kind, character_id if kind == 'people' else planet_id, user_id)
+
+    assert client.post(url).status_code == 201
+    assert client.post(url).status_code == 200
+    assert favorite_rows(app, model) == 1
+
+@pytest.mark.parametrize('method', ['post', 'delete'])
+@pytest.mark.parametrize('kind, missing', [('people', "Character not found"), ('planet', "Planet not found")])
+def test_missing_targets_are_404(client, ids, method, kind, missing):
+    user_id, character_id, planet_id = ids
+    entity_id = character_id if kind == 'people' else planet_id
+    request = getattr(client, method)
+
+    response = request('/favorite/%s/%d?user_id=%d' % (kind, entity_id, user_id + 1))
+    assert response.status_code == 404 and response.get_json() == {"error": "User not found"}
+    response = request('/favorite/%s/%d?user_id=%d' % (kind, entity_id + 1, user_id))
+    assert response.status_code == 404 and response.get_json() == {"error": missing}
+
+def test_removing_a_missing_favorite_is_404(client, ids):
+    user_id, character_id, planet_id = ids
+
+    assert client.delete('/favorite/people/%d?user_id=%d' % (character_id, user_id)).get_json() == {"error": "Favorite character not found"}
+    assert client.delete('/favorite/planet/%d?user_id=%d' % (planet_id, user_id)).get_json() == {"error": "Favorite planet not found"}
+
+def favorite_count(app, model, entity_id):
+    with app.app_context():
+        return db.session.get(model, entity_id).favorite_count
+
+def test_favorite_count_follows_the_favorites(app, client, ids):
+    user_id, character_id, _ = ids
+    other_user_id, = add(app, user(2))
+    url = '/favorite/people/%d?user_id=%d' % (character_id, user_id)
+
+    client.post(url)
+    client.post(url)
+    client.post('/favorite/people/%d?user_id=%d' % (character_id, other_user_id))
+    assert favorite_count(app, Character, character_id) == 2
+    client.delete(url)
+    client.delete(url)
+    assert favorite_count(app, Character, character_id) == 1
+
+def test_favorite_count_is_in_the_same_transaction(app, client, ids, monkeypatch):
+    user_id, _, planet_id = ids
+
+    def fail(*args):
+        raise RuntimeError("favorite_count update failed")
+    monkeypatch.setattr(users, 'change_favorite_count', fail)
+    with pytest.raises(RuntimeError):
+        client.post('/favorite/planet/%d?user_id=%d' % (planet_id, user_id))
+
+    assert favorite_rows(app, FavoritePlanet) == 0
+
+def test_reconcile_fixes_drifted_counts(app, ids):
+    user_id, character_id, planet_id = ids
+    with app.app_context():
+        db.session.add(FavoriteCharacter(user_id=user_id, character_id=character_id))
+        db.session.execute(update(Planet).values(favorite_count=5))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(reconcile_favorites_command)
+    assert result.exit_code == 0
+    assert result.output == "characters: 1 favorite counts fixed\nplanets: 1 favorite counts fixed\n"
+    assert (favorite_count(app, Character, character_id), favorite_count(app, Planet, planet_id)) == (1, 0)
+
+@pytest.mark.parametrize('fields', ['name', 'bogus'])
+def test_favorites_reject_fields(client, ids, fields):
+    response = client.get('/users/favorites?user_id=%d&fields=%s' % (ids[0], fields))
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "'fields' is not supported on this endpoint, use compact=true for ids and names only"
@@ -0,0 +1,31 @@
+import pytest
+from conftest import character, planet, vehicle, political_group, add
+
+def populate(app, size):
+    group_ids = add(app, *[political_group(number) for number in range(3)])
+    planet_ids = add(app, *[planet(number) for number in range(size)])
+    character_ids = add(app, *[character(number, political_group_id=group_ids[number % 3]) for number in range(size)])
+    add(app, *[vehicle(number, planet_id=planet_ids[number % size], character_id=character_ids[number % size]) for number in range(2 * size)])
+
+# one SELECT for the page plus one SELECT ... IN per relationship, whatever the number of rows
+@pytest.mark.parametrize('size', [5, 40])
+@pytest.mark.parametrize('url, expected', [
+    ('/people?include=political_group,vehicles&limit=all', 3),
+    ('/people?include=vehicles&limit=all', 2),
+    ('/planets?include=vehicles&limit=all', 2),
+    ('/people/1?include=political_group,vehicles', 3),
+])
+def test_include_statements_dont_grow_with_the_rows(app, client, statements, size, url, expected):
+    populate(app, size)
+    statements.clear()
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert len(statements) == expected, [statement for statement, _ in statements]
+
+def test_included_rows(app, client):
+    populate(app, 5)
+    first = client.get('/people?include=political_group,vehicles&limit=1').get_json()['results'][0]
+
+    assert first['political_group']['name'] == 'Group 0'
+    assert [vehicle['name'] for vehicle in first['vehicles']] == ['Vehicle 0', 'Vehicle 5']
@@ -0,0 +1,28 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models import db
+from conftest import character, add
+
+def test_failed_statements_leave_nothing_on_the_connection(app):
+    with app.test_request_context():
+        app.extensions['metrics']._start()
+        with db.engine.connect() as connection:
+            before = repr(connection.info)
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM no_such_table"))
+            connection.execute(text("SELECT 1"))
+
+            # the pooled connection outlives the request, nothing of these statements may stay on it
+            assert repr(connection.info) == before
+        assert g.sql_stats['count'] == 1
+
+def test_request_statements_are_counted(app, client):
+    add(app, character(1))
+    client.get('/people/1')
+    client.get('/people/1')
+
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert 'http_request_sql_statements_count{method="GET",route="/people/<int:people_id>"} 2' in metrics
@@ -0,0 +1,53 @@
+import os
+import pytest
+from flask_migrate import upgrade, downgrade
+from sqlalchemy import text, update
+from models import db, Character
+from conftest import TEST_CONFIG, character, add
+from factory import create_app
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), os.pardir, 'migrations')
+
+@pytest.fixture
+def migrated(tmp_path):
+    """App on a SQLite file built by the alembic migrations instead of create_all(), with the FTS5 triggers"""
+    app = create_app(dict(TEST_CONFIG, SQLALCHEMY_DATABASE_URI="sqlite:///%s" % (tmp_path / 'migrated.db')))
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+def rows_written(statement):
+    """Rows changed by the statement, the ones written by triggers included"""
+    before = db.session.execute(text("SELECT total_changes()")).scalar()
+    db.session.execute(statement)
+    return db.session.execute(text("SELECT total_changes()")).scalar() - before
+
+def test_favorite_count_update_leaves_the_search_index_alone(migrated):
+    character_id, = add(migrated, character(1))
+    with migrated.app_context():
+        assert rows_written(update(Character).where(Character.id == character_id).values(favorite_count=Character.favorite_count + 1)) == 1
+        assert rows_written(update(Character).where(Character.id == character_id).values(name='Renamed')) > 1
+        db.session.commit()
+
+    assert [result['name'] for result in migrated.test_client().get('/search?q=renamed').get_json()['results']] == ['Renamed']
+
+def search_triggers(app):
+    with app.app_context():
+        return db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_search_%' ORDER BY name")).scalars().all()
+
+def test_downgrade_keeps_the_search_triggers(migrated):
+    triggers = search_triggers(migrated)
+    assert len(triggers) == 12
+
+    with migrated.app_context():
+        downgrade(directory=MIGRATIONS, revision='0fc0650501e2')
+    assert search_triggers(migrated) == triggers
+
+    with migrated.app_context():
+        upgrade(directory=MIGRATIONS)
+    assert search_triggers(migrated) == triggers
+    add(migrated, character(1, name='Wedge Antilles'))
+    assert [result['name'] for result in migrated.test_client().get('/search?q=wedge').get_json()['results']] == ['Wedge Antilles']
@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy import update
+from models import db, Planet
+from conftest import character, planet, add
+
+def names(response):
+    return [result['name'] for result in response.get_json()['results']]
+
+def walk(client, url, field='name'):
+    """The field of every result, page by page, following the cursors"""
+    pages = []
+    response = client.get(url)
+    while True:
+        pages.append([result[field] for result in response.get_json()['results']])
+        cursor = response.get_json()['next']
+        if cursor is None:
+            return pages
+        response = client.get(url + '&after=' + cursor)
+
+def test_deleted_cursor_row_does_not_end_the_listing(app, client):
+    ids = add(app, *[character(number) for number in range(5)])
+    first = client.get('/people?sort=name&limit=2').get_json()
+    assert [person['name'] for person in first['results']] == ['Character 0', 'Character 1']
+
+    assert client.delete('/people/%d' % ids[1]).status_code == 200
+    response = client.get('/people?sort=name&limit=2&after=' + first['next'])
+    assert names(response) == ['Character 2', 'Character 3']
+    assert response.get_json()['next'] is not None
+
+def test_popular_is_stable_when_counts_change(app, client):
+    ids = add(app, *[planet(number, favorite_count=10 - number) for number in range(5)])
+    first = client.get('/planets/popular?limit=2').get_json()
+    assert [planet['name'] for planet in first['results']] == ['Planet 0', 'Planet 1']
+
+    # the last row of the first page loses its favorites while the client reads the second one
+    with app.app_context():
+        db.session.execute(update(Planet).where(Planet.id == ids[1]).values(favorite_count=0))
+        db.session.commit()
+    assert names(client.get('/planets/popular?limit=2&after=' + first['next'])) == ['Planet 2', 'Planet 3']
+
+def test_sort_ties_and_timestamps(app, client):
+    add(app, *[character(number, name='Same') for number in range(3)], *[character(number) for number in range(3, 5)])
+    everyone = walk(client, '/people?sort=-created_at&limit=all', 'id')
+
+    pages = walk(client, '/people?sort=-created_at&limit=2', 'id')
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == everyone[0]
+    assert walk(client, '/people?sort=name&limit=2') == [['Character 3', 'Character 4'], ['Same', 'Same'], ['Same']]
+
+def test_sort_column_left_out_of_the_fields(app, client):
+    add(app, *[character(number) for number in range(3)])
+    response = client.get('/people?sort=-name&fields=id&limit=2').get_json()
+
+    assert response['results'] == [{"id": 3}, {"id": 2}]
+    assert client.get('/people?sort=-name&fields=id&limit=2&after=' + response['next']).get_json()['results'] == [{"id": 1}]
+
+@pytest.mark.parametrize('cursor', ['12', 'not a cursor', 'WyJhIl0', 'WzEsIDJd', 'WyJhIiwgdHJ1ZV0'])
+def test_invalid_cursor_is_a_400(client, cursor):
+    # a plain id, garbage, ["a"], [1, 2] (not a name) and ["a", true]
+    assert client.get('/people?sort=name&after=' + cursor).status_code == 400
+
+def test_id_cursor_stays_a_plain_id(app, client):
+    add(app, *[character(number) for number in range(3)])
+
+    assert client.get('/people?limit=2').get_json()['next'] == '2'
+    assert client.get('/people?sort=-id&limit=2').get_json()['next'] == '2'
+
+def query_plan(app, statements):
+    """EXPLAIN QUERY PLAN details of the page query among the recorded statements"""
+    statement, parameters = next((statement, parameters) for statement, parameters in statements if 'LIMIT' in statement)
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            return [row[3] for row in connection.cursor().execute('EXPLAIN QUERY PLAN ' + statement, parameters)]
+        finally:
+            connection.close()
+
+@pytest.mark.parametrize('url, index', [
+    ('/people?affiliation=Rebel%20Alliance', 'ix_characters_affiliation_id (affiliation=?'),
+    ('/people?species=Human', 'ix_characters_species_id (species=?'),
+    ('/people?homeworld=Tatooine&after=1', 'ix_characters_homeworld_id (homeworld=? AND id>?)'),
+    ('/planets?climate=arid', 'ix_planets_climate_id (climate=?'),
+    ('/planets?terrain_type=desert', 'ix_planets_terrain_type_id (terrain_type=?'),
+    ('/people?sort=name', 'ix_characters_name_id'),
+    ('/planets?sort=-created_at', 'ix_planets_created_at_id'),
+    ('/people/popular', 'ix_characters_favorite_count_id'),
+])
+def test_listings_use_their_index(app, client, statements, url, index):
+    add(app, *[character(number) for number in range(3)], *[planet(number) for number in range(3)])
+    assert client.get(url).status_code == 200
+
+    plan = query_plan(app, statements)
+    assert any(index in detail for detail in plan), plan
+    assert not any('TEMP B-TREE' in detail for detail in plan), plan
+
+@pytest.mark.parametrize('url, index', [
+    ('/people?sort=name&limit=1', 'ix_characters_name_id (name>?)'),
+    ('/planets?sort=-created_at&limit=1', 'ix_planets_created_at_id (created_at<?)'),
+    ('/people/popular?limit=1', 'ix_characters_favorite_count_id (favorite_count<?)'),
+])
+def test_sorted_cursor_seeks_the_index(app, client, statements, url, index):
+    add(app, *[character(number) for number in range(3)], *[planet(number) for number in range(3)])
+    cursor = client.get(url).get_json()['next']
+    statements.clear()
+
+    assert client.get(url + '&after=' + cursor).status_code == 200
+    plan = query_plan(app, statements)
+    assert any(index in detail for detail in plan), plan
+    assert not any('TEMP B-TREE' in detail for detail in plan), plan
+
+def test_any_of_filter_searches_the_index(app, client, statements):
+    add(app, *[character(number) for number in range(3)])
+    assert client.get('/people?species=Human&species=Droid').status_code == 200
+
+    # one index search per value, their rows then have to be merged back into id order
+    assert query_plan(app, statements)[0] == 'SEARCH characters USING INDEX ix_characters_species_id (species=?)'
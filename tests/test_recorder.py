@@ -0,0 +1,41 @@
+import json
+import pytest
+from conftest import make_app
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Client of an app recording every request, and a function reading back what was written"""
+    path = tmp_path / 'capture.jsonl'
+    app = make_app({"RECORD_REQUESTS": str(path), "RECORD_SAMPLE_RATE": 1.0})
+    return app.test_client(), lambda: [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_password_is_not_recorded(recorded):
+    client, records = recorded
+    client.post('/users', json={"email": "luke@example.com", "password": "hunter2", "profile": {"api_token": "abc"}})
+
+    record, = records()
+    assert 'hunter2' not in json.dumps(record) and 'abc' not in json.dumps(record)
+    assert json.loads(record['body']) == {"email": "luke@example.com", "password": "[REDACTED]", "profile": {"api_token": "[REDACTED]"}}
+
+def test_ndjson_and_form_bodies_are_redacted(recorded):
+    client, records = recorded
+    client.post('/people/bulk', data='{"name": "a", "secret": "x1"}\n{"name": "b"}\n', content_type='application/x-ndjson')
+    client.post('/users', data={"email": "a@example.com", "password": "x2"})
+
+    ndjson, form = records()
+    assert [json.loads(line) for line in ndjson['body'].splitlines()] == [{"name": "a", "secret": "[REDACTED]"}, {"name": "b"}]
+    assert form['body'] == 'email=a%40example.com&password=%5BREDACTED%5D'
+
+def test_unparseable_body_is_left_out(recorded):
+    client, records = recorded
+    client.post('/users', data='{"password": "x3"', content_type='application/json')
+    client.post('/users', data='password x4', content_type='text/plain')
+
+    assert [record['body'] for record in records()] == [None, None]
+
+def test_query_is_redacted_only_when_needed(recorded):
+    client, records = recorded
+    client.get('/people?fields=id,name&sort=-name')
+    client.get('/people?token=x5&limit=2')
+
+    assert [record['query'] for record in records()] == ['fields=id,name&sort=-name', 'token=%5BREDACTED%5D&limit=2']
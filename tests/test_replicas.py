@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import insert
+from models import db, Character, Planet
+from conftest import make_app, character, add
+
+@pytest.fixture
+def replicated(tmp_path):
+    """App on a primary SQLite file with a second file as its replica, they hold different rows to tell them apart"""
+    app = make_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///%s" % (tmp_path / 'primary.db'),
+                    "DATABASE_REPLICA_URLS": "sqlite:///%s" % (tmp_path / 'replica.db')})
+    add(app, character(1, name='On the primary'))
+    with app.app_context():
+        replica = db.engines['replica_0']
+        db.metadata.create_all(replica)
+        with replica.begin() as connection:
+            connection.execute(insert(Character), [{"name": "On the replica", "favorite_count": 0}])
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+CHARACTER_FIELDS = ('name', 'description', 'species', 'homeworld', 'special_ability', 'affiliation', 'favorite_weapon',
+                    'eye_color', 'hair_color', 'birth_year', 'gender')
+
+def names(client):
+    return [person['name'] for person in client.get('/people').get_json()['results']]
+
+def test_reads_go_to_the_replica(replicated):
+    assert names(replicated.test_client()) == ['On the replica']
+
+def test_writer_is_pinned_to_the_primary(replicated):
+    writer, reader = replicated.test_client(), replicated.test_client()
+    assert writer.post('/people', json={field: getattr(character(2), field) for field in CHARACTER_FIELDS}).status_code == 201
+
+    assert names(writer) == ['On the primary', 'Character 2']
+    assert names(reader) == ['On the replica']
+
+def test_failed_write_does_not_pin(replicated):
+    client = replicated.test_client()
+    assert client.delete('/people/12').status_code == 404
+
+    assert names(client) == ['On the replica']
+
+def test_no_replicas_by_default(app, client):
+    add(app, character(1))
+
+    assert 'replica_0' not in app.config.get('SQLALCHEMY_BINDS', {})
+    assert names(client) == ['Character 1']
+
+def test_single_entity_reads_go_to_the_replica(replicated):
+    reader, writer = replicated.test_client(), replicated.test_client()
+    assert reader.get('/people/1').get_json()['name'] == 'On the replica'
+    assert writer.post('/people', json={field: getattr(character(2), field) for field in CHARACTER_FIELDS}).status_code == 201
+
+    # same cache entry, each read checks it against its own database and loads it again when they differ
+    assert writer.get('/people/1').get_json()['name'] == 'On the primary'
+    assert reader.get('/people/1').get_json()['name'] == 'On the replica'
+
+def test_single_planet_only_on_the_replica(replicated):
+    with replicated.app_context():
+        with db.engines['replica_0'].begin() as connection:
+            connection.execute(insert(Planet), [{"name": "Replicated planet", "favorite_count": 0}])
+
+    assert replicated.test_client().get('/planets/1').get_json()['name'] == 'Replicated planet'
@@ -0,0 +1,27 @@
+from conftest import character, planet, add
+
+def test_search_without_the_fts5_table(app, client):
+    # create_all() databases have no search_index, only the migrations create it
+    add(app, character(1, name='Luke Skywalker'), planet(1, name='Tatooine', description='home of Luke'), character(2))
+    response = client.get('/search?q=Luke')
+
+    assert response.status_code == 200
+    assert [(result['type'], result['name']) for result in response.get_json()['results']] == [('people', 'Luke Skywalker'), ('planets', 'Tatooine')]
+
+def test_search_requires_a_query(client):
+    assert client.get('/search').status_code == 400
+
+def test_like_wildcards_are_literal(app, client):
+    add(app, character(1, name='100% Droid'), character(2, name='R2_D2'), character(3, name='1000 Droids'), character(4, name='R2-D2!'))
+
+    def names(q):
+        return [result['name'] for result in client.get('/search', query_string={'q': q}).get_json()['results']]
+    assert names('100%') == ['100% Droid']
+    assert names('R2_') == ['R2_D2']
+    assert names('D2!') == ['R2-D2!']
+
+def test_fields_are_rejected(client):
+    response = client.get('/search?q=Luke&fields=name')
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "'fields' is not supported on this endpoint"
@@ -0,0 +1,30 @@
+import pytest
+from conftest import character, planet, vehicle, add
+
+VEHICLES = 30
+
+@pytest.fixture
+def vehicles(app):
+    planet_ids = add(app, *[planet(number) for number in range(3)])
+    character_ids = add(app, *[character(number) for number in range(3)])
+    add(app, *[vehicle(number, planet_id=planet_ids[number % 3], character_id=character_ids[number % 3]) for number in range(VEHICLES)])
+
+@pytest.mark.parametrize('query', ['', '&fields=id,name,planet', '&fields=id,name,character', '&fields=id,name'])
+def test_listing_runs_one_statement(client, vehicles, statements, query):
+    response = client.get('/vehicles?limit=all' + query)
+
+    assert response.status_code == 200
+    assert len(response.get_json()['results']) == VEHICLES
+    assert len(statements) == 1, [statement for statement, _ in statements]
+
+def test_listing_embeds_planet_and_character(client, vehicles):
+    first = client.get('/vehicles?limit=1').get_json()['results'][0]
+
+    assert first['planet']['name'] == 'Planet 0'
+    assert first['character']['name'] == 'Character 0'
+
+def test_export_runs_one_statement(client, vehicles, statements):
+    response = client.get('/vehicles/export?fields=id,name,planet,character')
+
+    assert len(response.get_data(as_text=True).splitlines()) == VEHICLES
+    assert len(statements) == 1